@@ -0,0 +1,161 @@
+"""
+Game archive: many games in one binary file, each stored as its packed 16-bit move codes, plus an index file with
+the offset and length of every game, so that any game is read without going through the ones before it. Both files
+are mapped in memory to be read and only ever appended to.
+
+	python archive.py partides.pyca --add joc*.pych
+	python archive.py partides.pyca --show 3
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from argparse import ArgumentParser
+from array import array
+from typing import Iterator, Sequence
+
+from board import Board
+
+MAGIC = b'PYCA'
+INDEX_MAGIC = b'PYCI'
+VERSION = 1
+HEADER = struct.Struct('<4sB')
+# Offset of the moves of a game in the data file and their number
+ENTRY = struct.Struct('<QI')
+
+DEFAULT_PATH = "partides.pyca"
+INDEX_EXTENSION = ".pyci"
+
+
+def _little_endian(codes: array[int]) -> array[int]:
+	if sys.byteorder == 'big':
+		codes = array('H', codes)
+		codes.byteswap()
+	return codes
+
+
+class Archive:
+	def __init__(self, path: str = DEFAULT_PATH, writable: bool = False):
+		"""
+		@param writable: whether games can be appended. The files are created if they do not exist.
+		"""
+		self.path = path
+		self.index_path = os.path.splitext(path)[0] + INDEX_EXTENSION
+		self.writable = writable
+
+		found = [os.path.exists(p) for p in (path, self.index_path)]
+		if any(found) and not all(found):
+			raise ValueError(f"El fitxer no és un arxiu de partides vàlid: falta "
+			                 f"{self.index_path if found[0] else path}")
+		if writable and not any(found):
+			for p, magic in ((path, MAGIC), (self.index_path, INDEX_MAGIC)):
+				with open(p, "wb") as f:
+					f.write(HEADER.pack(magic, VERSION))
+
+		mode = "r+b" if writable else "rb"
+		self.data = open(path, mode)
+		self.index = open(self.index_path, mode)
+		for f, magic in ((self.data, MAGIC), (self.index, INDEX_MAGIC)):
+			found, version = HEADER.unpack(f.read(HEADER.size))
+			if found != magic or version != VERSION:
+				self.close()
+				raise ValueError(f"El fitxer no és un arxiu de partides vàlid: {f.name}")
+
+		self.count = (self.index.seek(0, 2) - HEADER.size) // ENTRY.size
+		self._data_map: mmap.mmap | None = None
+		self._index_map: mmap.mmap | None = None
+
+	def close(self):
+		self._unmap()
+		self.data.close()
+		self.index.close()
+
+	def __enter__(self) -> Archive:
+		return self
+
+	def __exit__(self, *_):
+		self.close()
+
+	def _unmap(self):
+		for m in (self._data_map, self._index_map):
+			if m is not None:
+				m.close()
+		self._data_map = self._index_map = None
+
+	def _maps(self) -> tuple[mmap.mmap, mmap.mmap]:
+		# Mapped on first read and again after every append, since a mapping does not grow with its file
+		if self._data_map is None or self._index_map is None:
+			self._data_map = mmap.mmap(self.data.fileno(), 0, access=mmap.ACCESS_READ)
+			self._index_map = mmap.mmap(self.index.fileno(), 0, access=mmap.ACCESS_READ)
+		return self._data_map, self._index_map
+
+	def __len__(self) -> int:
+		return self.count
+
+	def append(self, codes: Sequence[int]) -> int:
+		"""Adds the game, given by the codes of its moves, and returns its number."""
+		assert self.writable
+		self._unmap()
+
+		offset = self.data.seek(0, 2)
+		self.data.write(_little_endian(array('H', codes)).tobytes())
+		self.index.seek(0, 2)
+		self.index.write(ENTRY.pack(offset, len(codes)))
+		self.data.flush()
+		self.index.flush()
+
+		self.count += 1
+		return self.count - 1
+
+	def __getitem__(self, n: int) -> array[int]:
+		"""Codes of the moves of game n."""
+		if not -self.count <= n < self.count:
+			raise IndexError(n)
+		n %= self.count
+
+		data, index = self._maps()
+		offset, length = ENTRY.unpack_from(index, HEADER.size + n * ENTRY.size)
+		codes = array('H')
+		codes.frombytes(data[offset:offset + 2 * length])
+		return _little_endian(codes)
+
+	def __iter__(self) -> Iterator[array[int]]:
+		for n in range(self.count):
+			yield self[n]
+
+	def board(self, n: int) -> Board:
+		"""Final position of game n."""
+		board = Board()
+		for code in self[n]:
+			board.make(code)
+		return board
+
+
+if __name__ == '__main__':
+	from replay import replay_all
+	from search import notation
+
+	parser = ArgumentParser(description="Desa i consulta partides en un arxiu binari.")
+	parser.add_argument("archive", help="fitxer de l'arxiu")
+	parser.add_argument("--add", nargs="*", default=[], help="fitxers de partida (.pych) que s'hi afegeixen")
+	parser.add_argument("--partial", action="store_true",
+	                    help="afegeix també les partides amb errors, fins al primer moviment invàlid")
+	parser.add_argument("--jobs", type=int, default=None, help="processos entre els quals repartir els fitxers")
+	parser.add_argument("--show", type=int, default=None, help="número de la partida que es mostra")
+	args = parser.parse_args()
+
+	with Archive(args.archive, writable=bool(args.add)) as archive:
+		for r in replay_all(args.add, args.jobs):
+			if r.error is not None:
+				print(f"{r.path}: {r.error}")
+				if not args.partial:
+					continue
+			print(f"{r.path}: partida {archive.append(r.moves)}")
+
+		if args.show is not None:
+			print(' '.join(notation(Board(), archive[args.show])))
+
+		print(f"Partides: {len(archive)}")
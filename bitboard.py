@@ -0,0 +1,146 @@
+"""
+Helpers for 64-bit occupancy sets. Square 0 is a1, square 7 is h1 and square 63 is h8, so that the square of the
+point (x, y) is y * WIDTH + x.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+WIDTH = 8
+HEIGHT = 8
+SQUARES = WIDTH * HEIGHT
+
+EMPTY = 0
+FULL = (1 << SQUARES) - 1
+
+FILES = [sum(1 << (y * WIDTH + x) for y in range(HEIGHT)) for x in range(WIDTH)]
+RANKS = [((1 << WIDTH) - 1) << (y * WIDTH) for y in range(HEIGHT)]
+
+
+def square(x: int, y: int) -> int:
+	return y * WIDTH + x
+
+
+def coords(sq: int) -> tuple[int, int]:
+	return sq % WIDTH, sq // WIDTH
+
+
+def bit(sq: int) -> int:
+	return 1 << sq
+
+
+def is_within(x: int, y: int) -> bool:
+	return 0 <= x < WIDTH and 0 <= y < HEIGHT
+
+
+def lsb(bb: int) -> int:
+	"""Index of the lowest set bit. The set must not be empty."""
+	return (bb & -bb).bit_length() - 1
+
+
+def msb(bb: int) -> int:
+	"""Index of the highest set bit. The set must not be empty."""
+	return bb.bit_length() - 1
+
+
+def popcount(bb: int) -> int:
+	return bb.bit_count()
+
+
+def iter_squares(bb: int) -> Iterator[int]:
+	while bb:
+		low = bb & -bb
+		yield low.bit_length() - 1
+		bb ^= low
+
+
+def render(bb: int) -> str:
+	"""Debugging aid: draws the set with rank 8 on top."""
+	return '\n'.join(
+		''.join('1' if bb >> square(x, y) & 1 else '.' for x in range(WIDTH)) for y in range(HEIGHT - 1, -1, -1))
+
+
+def leaper_table(deltas: Iterable[tuple[int, int]]) -> list[int]:
+	"""For every square, the set of squares reached by jumping once by any of the deltas without leaving the board."""
+	deltas = list(deltas)
+	table: list[int] = []
+
+	for sq in range(SQUARES):
+		x, y = coords(sq)
+		bb = EMPTY
+		for dx, dy in deltas:
+			if is_within(x + dx, y + dy):
+				bb |= bit(square(x + dx, y + dy))
+		table.append(bb)
+
+	return table
+
+
+def ray_table(dx: int, dy: int) -> list[int]:
+	"""For every square, the set of squares met walking by (dx, dy) until the edge of the board, origin excluded."""
+	table: list[int] = []
+
+	for sq in range(SQUARES):
+		x, y = coords(sq)
+		bb = EMPTY
+		x, y = x + dx, y + dy
+		while is_within(x, y):
+			bb |= bit(square(x, y))
+			x, y = x + dx, y + dy
+		table.append(bb)
+
+	return table
+
+
+STEPS = [(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dx or dy]
+RAYS = {step: ray_table(*step) for step in STEPS}
+
+
+def ray(step: tuple[int, int], sq: int, occupied: int) -> int:
+	"""
+	Squares reached sliding from the square by the unit step, up to and including the first occupied one. The first
+	blocker is the nearest set bit of the ray: the lowest one if the step increases the square index, the highest one
+	otherwise. Everything behind it is cut away with the ray that starts there.
+	"""
+	rays = RAYS[step]
+	reach = rays[sq]
+	blockers = reach & occupied
+	if blockers:
+		reach &= ~rays[lsb(blockers) if square(*step) > 0 else msb(blockers)]
+	return reach
+
+
+def slide(steps: Iterable[tuple[int, int]], sq: int, occupied: int) -> int:
+	reach = EMPTY
+	for step in steps:
+		reach |= ray(step, sq, occupied)
+	return reach
+
+
+def _segments() -> list[list[int]]:
+	table = [[EMPTY] * SQUARES for _ in range(SQUARES)]
+
+	for step in STEPS:
+		for a in range(SQUARES):
+			for b in iter_squares(RAYS[step][a]):
+				table[a][b] = RAYS[step][a] & ~RAYS[step][b]
+
+	return table
+
+
+# Squares after a up to and including b when both lie on a common line, and no squares otherwise
+SEGMENTS = _segments()
+
+
+def offset(sq: int, dx: int, dy: int) -> int | None:
+	"""Square reached from the square by the delta, or None off the board."""
+	x, y = sq % WIDTH + dx, sq // WIDTH + dy
+	return square(x, y) if is_within(x, y) else None
+
+
+# Square reflected across the horizontal center line, which swaps the sides of the teams
+MIRROR = [square(sq % WIDTH, HEIGHT - 1 - sq // WIDTH) for sq in range(SQUARES)]
+
+# Squares one step away in each of the eight directions
+NEIGHBOURS = [[n for n in (offset(sq, dx, dy) for dx, dy in STEPS) if n is not None] for sq in range(SQUARES)]
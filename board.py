@@ -2,12 +2,19 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
+from array import array
+from dataclasses import dataclass
 
 from text import Estils, Colors
 
+import bitboard
+import evaluation
+import zobrist
+from bitboard import bit, iter_squares, square
+from zobrist import Zobrist
 from plane import CardinalDirection, FreeVector, Point, Ref, Bounds, Vector, FixedVector, Direction
 from enum import Enum
+from functools import cache, lru_cache
 from typing import Mapping, Sequence, overload, TypeVar, Callable
 
 T = TypeVar('T')
@@ -17,7 +24,28 @@ def might_eq(a: T | None, b: T) -> bool:
 	return a is None or a == b
 
 
+# Moves packed in 16 bits, as passed around in array('H') buffers: origin square in the lowest 6 bits, destination
+# square in the next 6 and flags in the top 4
+MOVE_SQUARE = 0x3F
+MOVE_DEST_SHIFT = 6
+FLAG_CAPTURE = 1 << 12
+
+
+def pack_move(origin: int, dest: int, flags: int = 0) -> int:
+	return origin | dest << MOVE_DEST_SHIFT | flags
+
+
+def move_origin(code: int) -> int:
+	return code & MOVE_SQUARE
+
+
+def move_dest(code: int) -> int:
+	return code >> MOVE_DEST_SHIFT & MOVE_SQUARE
+
+
 class RelativeFreeVector(FreeVector):
+	__slots__ = ()
+
 	@overload
 	def __init__(self, a: int, b: int):
 		pass
@@ -45,7 +73,11 @@ class RelativeFreeVector(FreeVector):
 
 
 class Move(FixedVector):
-	@dataclass
+	# The origin and destination cells are the references of the vector. Move generation and search work with packed
+	# codes instead, and a Move is only built from one when it has to be shown or made from the game.
+	__slots__ = ('piece', 'capture')
+
+	@dataclass(frozen=True, slots=True)
 	class Partial:
 		kind: PieceKind | None = None
 		initial_file: Letter | None = None
@@ -54,24 +86,30 @@ class Move(FixedVector):
 		final_file: Letter | None = None
 		final_rank: int | None = None
 
-		"""Returns true if there is any non-None value after the specified index"""
-
-		def check_nones(self, from_name: str) -> bool:
-			begin = False
-			for name, value in asdict(self).items():
-				if from_name == name:
-					begin = True
-				if begin and value is not None:
-					return True
-
-			return False
-
-		def initial_might_eq(self, file: Letter, rank: int, kind: PieceKind):
-			return might_eq(self.initial_file, file) and might_eq(self.initial_rank, rank) and might_eq(self.kind, kind)
-
-		def final_might_eq(self, file: Letter, rank: int, capture: bool):
-			return might_eq(self.final_file, file) and might_eq(self.final_rank, rank) and might_eq(self.is_capture,
-			                                                                                        capture)
+		# Positions of the fields, in the order they are written
+		KIND, INITIAL_FILE, INITIAL_RANK, CAPTURE, FINAL_FILE, FINAL_RANK = range(6)
+
+		def origins(self, board: Board, team: Team) -> int:
+			"""Squares of the pieces of the team that match the kind and the initial square."""
+			found = board.occupancy[team.index]
+			if self.kind is not None:
+				found &= board.kinds[self.kind.index]
+			if self.initial_file is not None:
+				found &= bitboard.FILES[self.initial_file.value]
+			if self.initial_rank is not None:
+				found &= bitboard.RANKS[self.initial_rank]
+			return found
+
+		def destinations(self, board: Board, team: Team) -> int:
+			"""Squares that match the final square and the capture mark."""
+			found = ~board.occupancy[team.index] & bitboard.FULL
+			if self.final_file is not None:
+				found &= bitboard.FILES[self.final_file.value]
+			if self.final_rank is not None:
+				found &= bitboard.RANKS[self.final_rank]
+			if self.is_capture:
+				found &= board.occupancy[team.opponent.index]
+			return found
 
 	class NotationBaseError(Exception):
 		def __init__(self, message: str):
@@ -87,21 +125,37 @@ class Move(FixedVector):
 
 	def __init__(self, piece: Piece, origin: Board.Cell, dest: Board.Cell):
 		self.piece = piece
-		self.origin = origin
-		self.dest = dest
 		self.capture = dest.piece
 
-		super().__init__(self.origin.obj.x, self.origin.obj.y, self.dest.obj.x, self.dest.obj.y, self.origin, self.dest)
+		super().__init__(origin.obj.x, origin.obj.y, dest.obj.x, dest.obj.y, origin, dest)
+
+	@property
+	def origin(self) -> Board.Cell:
+		return self.start_ref  # type: ignore
+
+	@property
+	def dest(self) -> Board.Cell:
+		return self.end_ref  # type: ignore
+
+	@property
+	def code(self) -> int:
+		return pack_move(self.origin.index, self.dest.index, FLAG_CAPTURE if self.capture is not None else 0)
 
 	def __call__(self):
 		self.piece.move(self)
 
+	def unmake(self):
+		"""Takes back the move, which must be the last one made on its board."""
+		board = self.piece.board
+		assert board.played and board.played[-1][0] == self.code
+		board.unmake()
+
 	@staticmethod
-	def query(s: str, team: Team) -> list[Move]:
+	def query(s: str, team: Team, board: Board) -> list[Move]:
 		move: None | Move = None
 		
 		try:
-			move = Move.from_notation(s, team)
+			move = Move.from_notation(s, team, board)
 		except Exception as e:
 			if isinstance(e, Move.AmbiguousMoveError):
 				return e.moves
@@ -111,10 +165,11 @@ class Move(FixedVector):
 		return []
 			
 	@staticmethod
-	def from_notation(s: str, team: Team) -> Move | None:
+	def from_notation(s: str, team: Team, board: Board) -> Move | None:
 		"""
-		Returns the Move object described by the provided string. The string must use algebraic notation and may use
-		shortened versions. It is recommended to always provide the full form, since ambiguous moves will raise an error.
+		Returns the Move object described by the provided string on the given board. The string must use algebraic
+		notation and may use shortened versions. It is recommended to always provide the full form, since ambiguous
+		moves will raise an error.
 
 		If the piece kind is omitted, it is assumed that the move refers to the piece with the lowest score (in the case
 		of traditional chess, the pawn).
@@ -124,7 +179,9 @@ class Move(FixedVector):
 
 		Minimal algebraic notation, however, is not allowed; hence, the provided string must have a minimum length of 2.
 
-		>>> Move.from_notation('a1', Team.WHITE), Move.from_notation('R1a3', Team.BLACK), Move.from_notation('Bxe5', Team.BLACK)
+		>>> b = Board()
+		>>> (Move.from_notation('a1', Team.WHITE, b), Move.from_notation('R1a3', Team.BLACK, b),
+		...  Move.from_notation('Bxe5', Team.BLACK, b))
 
 		@raise TypeError if the provided object is not a string or its length is not appropriate.
 		@raise SyntaxError if the syntax is incorrect.
@@ -138,87 +195,10 @@ class Move(FixedVector):
 		if not (isinstance(s, str) and 1 <= len(s) <= 6):
 			raise TypeError
 
-		partial = Move.Partial()
-
-		for letter in s:
-			if letter.isalpha():
-				if letter == 'x':
-
-					if partial.check_nones('is_capture'):
-						raise SyntaxError
-
-					partial.is_capture = True
-
-					is_capture = True
-				elif letter.isupper():
-					if partial.check_nones('kind'):
-						raise SyntaxError
-
-					kind = PieceKind.from_letter(letter)
-
-					if kind is None: raise NameError
-
-					partial.kind = kind
-				else:
-					if partial.check_nones('initial_file'):
-						if partial.check_nones('final_file'):
-							raise SyntaxError
-						
-						try:
-							partial.final_file = Letter[letter]
-						except:
-							raise SyntaxError
-					else:
-						try:
-							partial.initial_file = Letter[letter]
-						except:
-							raise SyntaxError
-			else:
-				if partial.check_nones('initial_rank'):
-					if partial.check_nones('final_rank'):
-						raise SyntaxError
-					try:
-						partial.final_rank = int(letter) - 1
-					except:
-						raise SyntaxError
-				else:
-					try:
-						partial.initial_rank = int(letter) - 1
-					except:
-						raise SyntaxError
-
-		if partial.is_capture is None and partial.final_file is None and partial.final_rank is None:
-			partial.final_rank = partial.initial_rank
-			partial.initial_rank = None
-			partial.final_file = partial.initial_file
-			partial.initial_file = None
-
-		moves: dict[Piece, list[Board.Cell]] = {}
-
-		if (partial.initial_rank is None) != (partial.initial_file is None):
-			q = partial.initial_file if partial.initial_rank is None else partial.initial_rank
-			assert q is not None
-
-			moves.update({c.piece: [m for m in c.piece.get_moves() if
-			                        isinstance(m, Board.Cell) and partial.final_might_eq(m.obj.file, m.obj.rank,
-			                                                                             bool(m.piece))] for c
-			              in Board.query(q) if
-			              c.piece and c.piece.team == team and partial.initial_might_eq(c.obj.file, c.obj.rank,
-			                                                                            c.piece.kind)})
-
-		elif partial.initial_rank is None and partial.initial_file is None:
-			moves.update({p: [m for m in p.get_moves() if
-			                  isinstance(m, Board.Cell) and partial.final_might_eq(m.obj.file, m.obj.rank,
-			                                                                       bool(m.piece))] for p in
-			              Board.pieces if p.team == team and p.cell and might_eq(partial.kind, p.kind)})
-		else:
-			assert partial.initial_rank is not None and partial.initial_file is not None
+		partial = Move.parse(s)
 
-			origin = Coords(partial.initial_file, partial.initial_rank)
-			try:
-				cell = Board.get_cell(origin)
-			except Exception:
-				raise Move.NotationBaseError("Coordenades errònees")
+		if partial.initial_rank is not None and partial.initial_file is not None:
+			cell = board.get_cell(partial.initial_file.value, partial.initial_rank)
 
 			if cell.piece is None:
 				raise Move.NotationBaseError("No hi ha cap peça a l'origen especificat")
@@ -229,22 +209,14 @@ class Move(FixedVector):
 			if not might_eq(partial.kind, cell.piece.kind):
 				raise Move.NotationBaseError("El tipus de peça indicat no es correspon amb la cel·la d'origen")
 
-			for c in cell.piece.get_moves():
-				if isinstance(c, Board.Cell) and partial.final_might_eq(c.obj.file, c.obj.rank, bool(c.piece)):
-					if cell.piece not in moves:
-						moves[cell.piece] = [c]
-					else:
-						moves[cell.piece].append(c)
-
-		if len(moves) == 0:
-			raise Move.NotationBaseError("Cap moviment possible")
-
+		# Only the pieces that could reach one of the destinations on an empty board generate their moves
+		dests = partial.destinations(board, team)
 		possible: list[Move] = []
-		for p in list(moves.keys()):
-			if len(moves[p]) > 0:
-				for c in moves[p]:
-					assert p.cell
-					possible.append(Move(p, p.cell, c))
+
+		for sq in iter_squares(board.reaching(dests, team) & partial.origins(board, team)):
+			piece = board.cells[sq].piece
+			assert piece is not None
+			possible.extend(Move(piece, board.cells[sq], board.cells[d]) for d in iter_squares(piece.reach() & dests))
 
 		if len(possible) > 1:
 			raise Move.AmbiguousMoveError(possible)
@@ -254,17 +226,61 @@ class Move(FixedVector):
 
 		return possible[0]
 
+	@staticmethod
+	@lru_cache(maxsize=4096)
+	def parse(s: str) -> Move.Partial:
+		"""
+		Splits the notation into its fields in a single pass. Every character is looked up in NOTATION_SYMBOLS, which
+		gives the first field it can fill; files and ranks move on to the final square once the initial one, or
+		anything after it, is given. Fields must appear in order and only once.
+
+		@raise SyntaxError, NameError as described in from_notation.
+		"""
+		fields: list[PieceKind | Letter | int | bool | None] = [None] * 6
+		last = -1
+
+		for c in s:
+			symbol = NOTATION_SYMBOLS.get(c)
+			if symbol is None:
+				# An unknown capital letter in the place of the kind names a kind that does not exist
+				raise NameError if c.isupper() and last < Move.Partial.KIND else SyntaxError
+
+			field, value = symbol
+			if field in (Move.Partial.INITIAL_FILE, Move.Partial.INITIAL_RANK) and last >= field:
+				field += Move.Partial.FINAL_FILE - Move.Partial.INITIAL_FILE
+
+			if last >= field:
+				raise SyntaxError
+
+			fields[field] = value
+			last = field
+
+		kind, initial_file, initial_rank, is_capture, final_file, final_rank = fields
+
+		# A lone square is the destination
+		if is_capture is None and final_file is None and final_rank is None:
+			initial_file, final_file = None, initial_file
+			initial_rank, final_rank = None, initial_rank
+
+		return Move.Partial(kind, initial_file, initial_rank, is_capture, final_file, final_rank)  # type: ignore
+
+	@staticmethod
+	def from_code(board: Board, code: int) -> Move:
+		origin = board.cells[move_origin(code)]
+		assert origin.piece is not None
+		return Move(origin.piece, origin, board.cells[move_dest(code)])
+
 	@staticmethod
 	def from_vector(piece: Piece, v: RelativeFreeVector):
 		assert piece.cell is not None
 
-		return Move(piece, piece.cell, Board.get_cell(piece.cell.get(v)))
+		return Move(piece, piece.cell, piece.board.get_cell(piece.cell.get(v)))
 
 	@staticmethod
 	def from_coords(piece: Piece, coords: Coords):
 		assert piece.cell is not None
 
-		return Move(piece, piece.cell, Board.get_cell(coords))
+		return Move(piece, piece.cell, piece.board.get_cell(coords))
 
 	@staticmethod
 	def get_moves(p: Piece):
@@ -287,13 +303,17 @@ class Letter(Enum):
 
 
 class Piece:
+	__slots__ = ('team', 'kind', 'id', 'board', 'cell', 'history')
 
 	def __init__(self, team: Team, kind: PieceKind, cell: Board.Cell):
 		self.team = team
 		self.kind = kind
+		self.id = piece_id(team, kind)
+		self.board = cell.board
 		self.cell: Board.Cell | None = cell
 		self.place(cell)
-		self.history: list[Move] = []
+		# Packed codes of the moves made by the piece
+		self.history: list[int] = []
 
 	def place(self, cell: Board.Cell):
 		if self.cell:
@@ -302,60 +322,78 @@ class Piece:
 		cell.piece = self
 
 	def move(self, move: Move):
-		assert move.origin is self.cell and move.piece is self
-		if move.dest.piece is not None:
-			move.dest.piece.cell = None
-			self.team.score += move.dest.piece.kind.score
-
-		self.place(move.dest)
-		self.history.append(move)
+		assert move.origin is self.cell and move.piece is self and move.dest.piece is move.capture
+		self.board.make(move.code)
 
 	def is_move_possible(self, a: FreeVector | RelativeFreeVector | Board.Cell | Coords,
 	                     captures: bool | None = None) -> Board.Cell | None:
 		assert self.cell is not None
 
-		coord = self.cell.get(a) if isinstance(a, RelativeFreeVector) else (
-			self.cell.obj + a if isinstance(a, FreeVector) else (
-				(a if isinstance(a, Coords) else a.obj)))
-		is_within = Board.bounds.is_within(coord)
-		if not is_within: return None
+		if isinstance(a, Board.Cell):
+			cell = a
+		else:
+			if isinstance(a, Coords):
+				target = square(a.x, a.y) if a.is_within else None
+			elif isinstance(a, RelativeFreeVector) and self.team.mirrored:
+				target = bitboard.offset(self.cell.index, -a.dx, -a.dy)
+			else:
+				target = bitboard.offset(self.cell.index, a.dx, a.dy)
 
-		cell = Board.get_cell(coord) if isinstance(a, (RelativeFreeVector, FreeVector)) else (
-			Board.get_cell(a) if isinstance(a, Coords) else a)
+			if target is None: return None
+			cell = self.board.cells[target]
 
 		if captures:  # must capture
-			return cell if cell.piece and cell.piece.team != self.team else None
+			return cell if cell.mask & self.board.occupancy[self.team.opponent.index] else None
 		elif captures is None:  # may capture
-			return None if cell.piece and cell.piece.team == self.team else cell
+			return None if cell.mask & self.board.occupancy[self.team.index] else cell
 		else:  # must not capture
-			return None if cell.piece else cell
+			return None if cell.mask & self.board.occupied() else cell
 
 	def get(self, v: RelativeFreeVector):
 		pass
 
-	def get_moves(self) -> list[Board.Cell | str]:
+	def get_moves(self, captures_only: bool = False) -> list[Board.Cell | str]:
+		reach, named = self._destinations(captures_only)
+
+		return [*(self.board.cells[s] for s in iter_squares(reach)), *named]
+
+	def reach(self, captures_only: bool = False) -> int:
+		"""Squares the piece can move to, as a set. Named special moves are left out."""
+		return self._destinations(captures_only)[0]
+
+	def _destinations(self, captures_only: bool = False) -> tuple[int, list[str]]:
+		"""
+		@param captures_only: only the squares of enemy pieces are kept, and named special moves, which never
+		capture, are not generated.
+		"""
 		assert self.cell
 
-		destinations: list[Board.Cell | str] = []
+		sq = self.cell.index
+		occupied = self.board.occupied()
+		own = self.board.occupancy[self.team.index]
+		allowed = self.board.occupancy[self.team.opponent.index] if captures_only else ~own
 
-		for m in self.kind.get_moves(self.team):
-			if isinstance(m, CardinalDirection):
-				destinations.extend(Board.get_points(self.cell.obj, m, self.team))
+		# Non-sliding moves are looked up in the precomputed tables and sliding ones are cut at the first blocker, then
+		# both are filtered by occupancy
+		if self.kind.options.no_auto_capture:
+			reach = bitboard.EMPTY if captures_only else self.kind.leaps[self.team.index][sq] & ~occupied
+		else:
+			reach = self.kind.leaps[self.team.index][sq] & allowed
+		reach |= bitboard.slide(self.kind.slides[self.team.index], sq, occupied) & allowed
 
-			else:
-				if c := self.is_move_possible(m, captures=(False if self.kind.options.no_auto_capture else None)):
-					destinations.append(c)
+		named: list[str] = []
 
 		if self.kind.special:
-			special = list(self.kind.special(self).keys())
-			for a in special:
+			for a in self.kind.special(self):
 				if isinstance(a, RelativeFreeVector):
-					if c := self.is_move_possible(a, captures=None):
-						destinations.append(c)
-				else:
-					destinations.append(a if isinstance(a, Board.Cell) else a)
+					if c := self.is_move_possible(a, captures=True if captures_only else None):
+						reach |= c.mask
+				elif isinstance(a, Board.Cell):
+					reach |= a.mask & allowed
+				elif not captures_only:
+					named.append(a)
 
-		return destinations
+		return reach, named
 
 
 class Team(Enum):
@@ -364,10 +402,10 @@ class Team(Enum):
 
 	def __init__(self, id: str, locale: str, mirrored=False) -> None:
 		self.id = id
+		# Position of the team in the tables of the board, so that they are plain lists indexed without hashing
+		self.index = len(type(self).__members__)
 		self.mirrored = mirrored
 		self.locale = locale
-		self.score = 0
-		self.in_check = False
 		super().__init__()
 
 	@property
@@ -376,15 +414,14 @@ class Team(Enum):
 			return Team.BLACK
 		else:
 			return Team.WHITE
-		
-	def get(self, k: PieceKind) -> list[Piece]:
-		return [p for p in Board.pieces if p.kind == k and p.team == self]
 
 	def __invert__(self) -> Team:
 		return self.opponent
 
 
 class Coords(Point):
+	__slots__ = ()
+
 	@overload
 	def __init__(self, a: str):
 		pass
@@ -418,6 +455,20 @@ class Coords(Point):
 		else:
 			self.__init__(Letter[a[0].lower()], int(a[1]) - 1)
 
+	@staticmethod
+	def at(sq: int) -> Coords:
+		return SQUARE_COORDS[sq]
+
+	@staticmethod
+	def named(name: str) -> Coords:
+		c = SQUARE_NAMES.get(name)
+		return c if c is not None else Coords(name)
+
+	@staticmethod
+	def offset(sq: int, dx: int, dy: int) -> Coords | None:
+		target = bitboard.offset(sq, dx, dy)
+		return None if target is None else SQUARE_COORDS[target]
+
 	@property
 	def file(self):
 		return Letter(self.x)
@@ -426,14 +477,37 @@ class Coords(Point):
 	def rank(self):
 		return self.y
 
+	@property
+	def index(self) -> int:
+		return square(self.x, self.y)
+
+	@property
+	def is_within(self) -> bool:
+		return bitboard.is_within(self.x, self.y)
+
+	def neighbours(self) -> list[Coords]:
+		return SQUARE_NEIGHBOURS[self.index]
+
 	def invert(self) -> Coords:
-		return Board.get_cell(Board.bounds.get_mirrored_point(self, Direction.VERTICAL)).obj
+		if self.is_within:
+			return SQUARE_COORDS[bitboard.MIRROR[self.index]]
+		return Coords(Board.bounds.get_mirrored_point(self, Direction.VERTICAL))
 
 	def __str__(self):
 		return str(self.file.name) + str(self.rank + 1)
 
 	def __add__(self, other: tuple[int, int] | Vector) -> Coords:
-		return Coords(super().__add__(other))
+		dx, dy = (other._x, other._y) if isinstance(other, Vector) else other
+		x, y = self.x + dx, self.y + dy
+		return SQUARE_COORDS[square(x, y)] if bitboard.is_within(x, y) else Coords(x, y)
+
+
+# Interned coordinates of the squares of the board, by square index and by name, so that looking up or stepping
+# between squares allocates nothing. They are shared by every board and must never be mutated.
+SQUARE_COORDS = [Coords(*bitboard.coords(sq)) for sq in range(bitboard.SQUARES)]
+SQUARE_LABELS = [str(c) for c in SQUARE_COORDS]
+SQUARE_NAMES = dict(zip(SQUARE_LABELS, SQUARE_COORDS))
+SQUARE_NEIGHBOURS = [[SQUARE_COORDS[n] for n in bitboard.NEIGHBOURS[sq]] for sq in range(bitboard.SQUARES)]
 
 
 class PieceKindOptions:
@@ -447,20 +521,37 @@ class PieceKindOptions:
 # 		self.override = override
 
 
+def leaper_tables(vectors: Sequence[RelativeFreeVector]) -> list[list[int]]:
+	"""
+	Destination tables of the vectors for every team, by team index, mirrored for the teams that play upside down.
+	"""
+	return [bitboard.leaper_table((v.mirrored() if t.mirrored else v).to_tuple() for v in vectors) for t in Team]
+
+
+PAWN_DOUBLE_STEP = RelativeFreeVector(0, 2)
+PAWN_CAPTURE_VECTORS = [RelativeFreeVector(1, 1), RelativeFreeVector(-1, 1)]
+
+PAWN_DOUBLE_STEPS = leaper_tables([PAWN_DOUBLE_STEP])
+PAWN_CAPTURES = leaper_tables(PAWN_CAPTURE_VECTORS)
+
+
 def special_pawn(piece: Piece) -> Mapping[Board.Cell | RelativeFreeVector, None]:
 	assert piece.cell is not None
 
-	moves: list[Board.Cell | RelativeFreeVector] = []
+	sq = piece.cell.index
+	dests = PAWN_CAPTURES[piece.team.index][sq] & piece.board.occupancy[piece.team.opponent.index]
 
 	if len(piece.history) == 0:
-		if c := piece.is_move_possible(RelativeFreeVector(0, 2), captures=False):
-			moves.append(c)
+		dests |= PAWN_DOUBLE_STEPS[piece.team.index][sq] & ~piece.board.occupied()
+
+	return {piece.board.cells[s]: None for s in iter_squares(dests)}
 
-	for v in [RelativeFreeVector(1, 1), RelativeFreeVector(-1, 1)]:
-		if c := piece.is_move_possible(v, captures=True):
-			moves.append(c)
 
-	return {m: None for m in moves}
+# Squares every special move can reach on an empty board: those where it captures, and those where it only moves. Pawns
+# capture diagonally, but never with the double step.
+SPECIAL_TABLES: dict[Callable, tuple[list[list[int]], list[list[int]]]] = {
+	special_pawn: (PAWN_CAPTURES, PAWN_DOUBLE_STEPS),
+}
 
 
 # TODO: Metaclasses?
@@ -483,19 +574,37 @@ class PieceKind(Enum):
 	             options: PieceKindOptions = PieceKindOptions()
 	             ) -> None:
 		self._name = name
+		# Position of the kind in the tables of the board
+		self.index = len(type(self).__members__)
 		self.short = short
 		self.score = score
 		self.icon = {Team.WHITE: icon[0], Team.BLACK: icon[1]}
-		self.initial_pos = [(p if isinstance(p, Coords) else Coords(p))
+		self.initial_pos = [(p if isinstance(p, Coords) else Coords.named(p))
 		                    for p in ([initial_pos] if isinstance(initial_pos, str) or isinstance(initial_pos,
 		                                                                                          Coords) else initial_pos)]
 		self.moves = [m if isinstance(m, CardinalDirection) else RelativeFreeVector(m.dx, m.dy) for m in moves]
+		self.leaps = leaper_tables([m for m in self.moves if isinstance(m, RelativeFreeVector)])
+		captures, quiet = SPECIAL_TABLES.get(special, (None, None))
+		# Every table is by team index. Squares where the kind can capture without sliding, including those of its
+		# special moves.
+		self.attacks = [[bitboard.EMPTY] * bitboard.SQUARES for _ in Team] if options.no_auto_capture else list(
+			self.leaps)
+		if captures is not None:
+			self.attacks = [[a | c for a, c in zip(attacks, more)] for attacks, more in zip(self.attacks, captures)]
+		directions = [m for m in self.moves if isinstance(m, CardinalDirection)]
+		self.slides = [[(d.dx, d.dy) for d in (d.mirrored() if t.mirrored else d for d in directions)] for t in Team]
+		# Squares reached on an empty board
+		self.span = [[leaps[sq] | bitboard.slide(slides, sq, bitboard.EMPTY) for sq in range(bitboard.SQUARES)]
+		             for leaps, slides in zip(self.leaps, self.slides)]
+		for tables in (captures, quiet):
+			if tables is not None:
+				self.span = [[a | b for a, b in zip(span, more)] for span, more in zip(self.span, tables)]
 		self.special = special
 		self.options = options
 
-	def __call__(self) -> list[Piece]:
-		return [Piece(Team.WHITE, self, Board.get_cell(p)) for p in self.initial_pos] + [
-			Piece(Team.BLACK, self, Board.get_cell(Board.bounds.get_mirrored_point(p, Direction.VERTICAL))) for p in
+	def __call__(self, board: Board) -> list[Piece]:
+		return [Piece(Team.WHITE, self, board.get_cell(p)) for p in self.initial_pos] + [
+			Piece(Team.BLACK, self, board.get_cell(Board.bounds.get_mirrored_point(p, Direction.VERTICAL))) for p in
 			self.initial_pos]
 
 	def get_moves(self, team: Team) -> Sequence[FreeVector | CardinalDirection]:
@@ -509,6 +618,23 @@ class PieceKind(Enum):
 		return l[0] if len(l) else None
 
 
+def piece_id(team: Team, kind: PieceKind) -> int:
+	"""Position of the pieces of the team and kind in the per-piece tables of the board."""
+	return team.index * len(PieceKind) + kind.index
+
+
+PIECE_IDS = len(Team) * len(PieceKind)
+
+
+# Field of Move.Partial that every character of the algebraic notation fills first
+NOTATION_SYMBOLS: dict[str, tuple[int, PieceKind | Letter | int | bool]] = {
+	**{k.short: (Move.Partial.KIND, k) for k in PieceKind},
+	**{l.name: (Move.Partial.INITIAL_FILE, l) for l in Letter},
+	**{str(i + 1): (Move.Partial.INITIAL_RANK, i) for i in range(bitboard.HEIGHT)},
+	'x': (Move.Partial.CAPTURE, True),
+}
+
+
 # class Piece(Cell):
 # 	def __init__(self, board: Board, team: Team, kind: PieceKind, pos: str):
 # 		self.team = team
@@ -532,12 +658,42 @@ class PieceKind(Enum):
 
 
 class Board:
-	class Cell(Ref[Coords]):
-		def __init__(self, pos: Point):
-			self.piece: Piece | None = None
+	@dataclass
+	class TeamState:
+		score: int = 0
+		in_check: bool = False
 
-			c = Coords(pos)
-			super().__init__(str(c), c)
+	class Cell(Ref[Coords]):
+		__slots__ = ('board', '_piece', 'index', 'mask')
+
+		def __init__(self, board: Board, pos: Point):
+			self.board = board
+			self._piece: Piece | None = None
+			self.index = square(pos.x, pos.y)
+			self.mask = bit(self.index)
+
+			super().__init__(SQUARE_LABELS[self.index], SQUARE_COORDS[self.index])
+
+		@property
+		def piece(self) -> Piece | None:
+			return self._piece
+
+		@piece.setter
+		def piece(self, piece: Piece | None):
+			"""Keeps the occupancy sets, the key and the evaluation of the board in sync with the piece on this cell."""
+			board = self.board
+			if self._piece is not None:
+				old = self._piece
+				board.occupancy[old.team.index] &= ~self.mask
+				board.kinds[old.kind.index] &= ~self.mask
+				board.key ^= board.zobrist.pieces[old.id][self.index]
+				board.balance -= PIECE_VALUES[old.id][self.index]
+			if piece is not None:
+				board.occupancy[piece.team.index] |= self.mask
+				board.kinds[piece.kind.index] |= self.mask
+				board.key ^= board.zobrist.pieces[piece.id][self.index]
+				board.balance += PIECE_VALUES[piece.id][self.index]
+			self._piece = piece
 
 		def place(self, piece: Piece):
 			if self.piece:
@@ -552,7 +708,7 @@ class Board:
 			return self.obj + v
 
 		def invert(self) -> Board.Cell:
-			return Board.get_cell(Board.bounds.get_mirrored_point(self.obj, Direction.VERTICAL))
+			return self.board.get_cell(Board.bounds.get_mirrored_point(self.obj, Direction.VERTICAL))
 
 		def __add__(self, d: RelativeFreeVector):
 			return self.get(d)
@@ -563,129 +719,424 @@ class Board:
 		def __repr__(self):
 			return self.__str__()
 
+	bounds: Bounds = Bounds(0, 0, bitboard.WIDTH, bitboard.HEIGHT)
+
 	matrix: list[list[Cell]]
-	bounds: Bounds = Bounds(0, 0, 8, 8)
+	cells: list[Cell]
+	# Every piece of the game, captured ones included
 	pieces: list[Piece]
-
-	@classmethod
-	def get_points(cls, origin: Coords, v: CardinalDirection, team: Team) -> list[Cell]:
-		l = []
-		i = 1
+	# Pieces still on the board by piece_id of their team and kind, as ordered sets
+	roster: list[dict[Piece, None]]
+
+	# Number of pieces of each team attacking every square by team index, and the squares attacked by the piece on
+	# every square
+	attacked: list[list[int]]
+	attack_sets: list[int]
+	# By team index
+	state: list[TeamState]
+
+	# Moves made on the board, in order, as the packed code, the captured piece and the side to move and the score and
+	# check flag of every team from before the move. Only the last one can be taken back.
+	played: list[tuple[int, Piece | None, Team, tuple[tuple[int, bool], ...]]]
+
+	# Position key, updated whenever a piece is placed or removed and whenever the side to move changes
+	key: int
+	# Material and piece-square terms of White minus those of Black, updated whenever a piece is placed or removed
+	balance: int
+	zobrist: Zobrist
+
+	# Occupancy of every square as 64-bit sets, one per team and one per kind, by their index. The piece standing on a
+	# square is found by intersecting both.
+	occupancy: list[int]
+	kinds: list[int]
+
+	def get_points(self, origin: Coords, v: CardinalDirection, team: Team) -> list[Cell]:
+		"""Cells reachable sliding from the origin in the direction, nearest first."""
 		if team.mirrored:
 			v = v.mirrored()
-		while True:
-			try:
-				d = (origin + v.vector * i)
-				if not cls.bounds.is_within(d):
-					break
 
-				c = cls.get_cell(d)
+		step = (v.dx, v.dy)
+		reach = bitboard.ray(step, square(origin.x, origin.y), self.occupied()) & ~self.occupancy[team.index]
+		l = [self.cells[sq] for sq in iter_squares(reach)]
 
-				if c.piece is not None and c.piece.team == team:
-					break
-			except:
-				c = None
+		return l if square(*step) > 0 else l[::-1]
 
-			i += 1
+	def __init__(self, seed: int = zobrist.SEED):
+		"""
+		@param seed: seed of the random tables the position key is built from.
+		"""
+		self.zobrist = zobrist_keys(seed)
+		self.init()
+
+	def init(self) -> list[Piece]:
+		"""Sets up the initial position, discarding the current one."""
+		self.occupancy = [bitboard.EMPTY for _ in Team]
+		self.kinds = [bitboard.EMPTY for _ in PieceKind]
+		self.key = 0
+		self.balance = 0
+		self._turn = Team.WHITE
+		self.matrix = [[Board.Cell(self, Point(j, i)) for j in range(self.bounds.width)] for i in
+		               range(self.bounds.height)]
+		self.cells = [c for row in self.matrix for c in row]
+		self.pieces = []
+		for kind in PieceKind:
+			self.pieces.extend(kind(self))
+		self.roster = [{} for _ in range(PIECE_IDS)]
+		for p in self.pieces:
+			self.roster[p.id][p] = None
+
+		self.attacked = [[0] * bitboard.SQUARES for _ in Team]
+		self.attack_sets = [bitboard.EMPTY] * bitboard.SQUARES
+		# Index of the team of the piece that attacks the squares of attack_sets
+		self._attack_teams: list[int] = [Team.WHITE.index] * bitboard.SQUARES
+		self.update_attacks(bitboard.FULL)
+
+		self.state = [Board.TeamState() for _ in Team]
+		self.played = []
+
+		return self.pieces
+
+	@property
+	def turn(self) -> Team:
+		return self._turn
+
+	@turn.setter
+	def turn(self, team: Team):
+		if team is not self._turn:
+			self.key ^= self.zobrist.side
+		self._turn = team
+
+	def make(self, code: int):
+		"""Makes the packed move. It is not checked to be legal."""
+		origin = self.cells[move_origin(code)]
+		dest = self.cells[move_dest(code)]
+		piece = origin.piece
+		capture = dest.piece
+		assert piece is not None
+
+		white, black = self.state
+		self.played.append((code, capture, self.turn, ((white.score, white.in_check), (black.score, black.in_check))))
+
+		if capture is not None:
+			capture.cell = None
+			self.state[piece.team.index].score += capture.kind.score
+			del self.roster[capture.id][capture]
+
+		piece.place(dest)
+		piece.history.append(code)
+		self.update_attacks(origin.mask | dest.mask)
+		self.turn = piece.team.opponent
+
+	def unmake(self) -> int:
+		"""Takes back the last move made on the board and returns its code."""
+		code, capture, turn, states = self.played.pop()
+		origin = self.cells[move_origin(code)]
+		dest = self.cells[move_dest(code)]
+		piece = dest.piece
+		assert piece is not None
+
+		piece.history.pop()
+		piece.place(origin)
+
+		if capture is not None:
+			capture.cell = dest
+			dest.piece = capture
+			self.roster[capture.id][capture] = None
+
+		self.update_attacks(origin.mask | dest.mask)
+		self.turn = turn
+		for state, (score, in_check) in zip(self.state, states):
+			state.score = score
+			state.in_check = in_check
+		return code
+
+	def evaluate(self) -> int:
+		"""Static score of the position from the point of view of the side to move, in hundredths of a pawn."""
+		return -self.balance if self._turn.mirrored else self.balance
+
+	def get(self, team: Team, kind: PieceKind) -> list[Piece]:
+		return list(self.roster[piece_id(team, kind)])
+
+	def live(self, team: Team) -> list[Piece]:
+		"""Pieces of the team still on the board."""
+		return [p for kind in PieceKind for p in self.roster[piece_id(team, kind)]]
+
+	def attackers(self, sq: int, team: Team, occupied: int | None = None) -> int:
+		"""
+		Squares of the pieces of the team that could capture on the square.
 
-			if c is None: break
+		Every lookup is reversed: a piece on s reaches sq by a vector exactly when sq reaches s by the opposite one, and
+		the opposite vectors of one team are the vectors of the other.
 
-			l.append(c)
+		@param occupied: occupancy to slide through, if it must differ from the actual one.
+		"""
+		if occupied is None:
+			occupied = self.occupied()
 
-			if c.piece is not None:
-				break
+		found = bitboard.EMPTY
+		for kind in PieceKind:
+			pieces = self.kinds[kind.index] & self.occupancy[team.index]
+			if pieces:
+				found |= kind.attacks[team.opponent.index][sq] & pieces
+				if kind.slides[team.index]:
+					found |= bitboard.slide([(-dx, -dy) for dx, dy in kind.slides[team.index]], sq, occupied) & pieces
 
-		return l
+		return found
 
-	@classmethod
-	def init(cls) -> list[Piece]:
-		cls.matrix: list[list[Board.Cell]] = [[Board.Cell(Point(j, i)) for j in range(cls.bounds.width)] for i in
-		                                      range(cls.bounds.height)]
-		cls.pieces: list[Piece] = []
+	def reaching(self, dests: int, team: Team) -> int:
+		"""
+		Squares of the pieces of the team that would reach any of the destinations on an empty board, found by reversing
+		the empty-board tables the same way as attackers. A superset of the pieces that can actually move there.
+		"""
+		found = bitboard.EMPTY
 		for kind in PieceKind:
-			cls.pieces.extend(kind())
-			
-		for t in Team:
-			t.score = 0
-			t.in_check = False
+			pieces = self.kinds[kind.index] & self.occupancy[team.index]
+			if pieces:
+				span = kind.span[team.opponent.index]
+				for sq in iter_squares(dests):
+					found |= span[sq] & pieces
+
+		return found
+
+	def is_attacked(self, sq: int, team: Team) -> bool:
+		return self.attacked[team.index][sq] > 0
+
+	def attacks(self, sq: int, occupied: int | None = None) -> int:
+		"""Squares attacked by the piece on the square: where it could capture, or defends if the piece is its own."""
+		piece = self.cells[sq].piece
+		if piece is None:
+			return bitboard.EMPTY
+		if occupied is None:
+			occupied = self.occupied()
+		t = piece.team.index
+		return piece.kind.attacks[t][sq] | bitboard.slide(piece.kind.slides[t], sq, occupied)
+
+	def update_attacks(self, changed: int):
+		"""
+		Brings the attack counts up to date after the pieces on the changed squares were placed or removed. Only the
+		pieces on those squares and the sliders whose rays reached them can attack differently: a ray that is now cut
+		or freed at a square must have reached it before.
+		"""
+		touched = changed
+		for kind in PieceKind:
+			if any(kind.slides):
+				for sq in iter_squares(self.kinds[kind.index] & ~changed):
+					if self.attack_sets[sq] & changed:
+						touched |= bit(sq)
+
+		occupied = self.occupied()
+		for sq in iter_squares(touched):
+			old = self.attack_sets[sq]
+			if old:
+				counts = self.attacked[self._attack_teams[sq]]
+				for s in iter_squares(old):
+					counts[s] -= 1
+
+			piece = self.cells[sq].piece
+			new = self.attacks(sq, occupied) if piece else bitboard.EMPTY
+			if new:
+				counts = self.attacked[piece.team.index]
+				for s in iter_squares(new):
+					counts[s] += 1
+				self._attack_teams[sq] = piece.team.index
+
+			self.attack_sets[sq] = new
+
+	def king(self, team: Team) -> int | None:
+		"""Square of the king of the team, if it is still on the board."""
+		kings = self.kinds[PieceKind.KING.index] & self.occupancy[team.index]
+		return bitboard.lsb(kings) if kings else None
+
+	def checkers(self, team: Team) -> int:
+		"""Squares of the pieces giving check to the king of the team."""
+		sq = self.king(team)
+		return bitboard.EMPTY if sq is None else self.attackers(sq, team.opponent)
+
+	def in_check(self, team: Team) -> bool:
+		sq = self.king(team)
+		return sq is not None and self.attacked[team.opponent.index][sq] > 0
+
+	def pins(self, team: Team) -> dict[int, int]:
+		"""
+		Pieces of the team that shield their king from an enemy slider, mapped to the squares they can still move to
+		without exposing it: the line between the king and the pinning piece, the latter included.
+		"""
+		ksq = self.king(team)
+		if ksq is None:
+			return {}
+
+		them = team.opponent.index
+		own = self.occupancy[team.index]
+		enemy = self.occupancy[them]
+		occupied = own | enemy
+		pinned: dict[int, int] = {}
+
+		for step in bitboard.STEPS:
+			blocker = bitboard.ray(step, ksq, occupied) & occupied
+			if not blocker & own:
+				continue
+
+			behind = bitboard.ray(step, bitboard.lsb(blocker), occupied) & enemy
+			if not behind:
+				continue
+
+			back = (-step[0], -step[1])
+			if any(back in kind.slides[them] and self.kinds[kind.index] & behind for kind in PieceKind):
+				pinned[bitboard.lsb(blocker)] = bitboard.SEGMENTS[ksq][bitboard.lsb(behind)]
+
+		return pinned
 
-		return cls.pieces
+	def legal_moves(self, captures_only: bool = False) -> list[Move]:
+		return [Move.from_code(self, code) for code in self.legal_codes(captures_only)]
+
+	def legal_codes(self, captures_only: bool = False) -> array[int]:
+		"""
+		Packed codes of all legal moves of the side to move, or only of those that capture. Checkers and pins are
+		computed once and each piece's destinations are masked with them: when in check, other pieces may only capture
+		the checker or step between it and the king (and not at all in double check); pinned pieces may only move along
+		their pin; and the king may only go to squares that no enemy piece attacks once the king itself no longer blocks
+		the way.
+
+		Attacks are read from the attack counts. Those miss the squares behind the king on the lines of sliding
+		checkers, so the checkers' attacks are recomputed through the king.
+		"""
+		team = self.turn
+		ksq = self.king(team)
+		live = self.live(team)
+		enemy = self.occupancy[team.opponent.index]
+		codes = array('H')
+
+		if ksq is None:
+			for p in live:
+				assert p.cell
+				codes.extend(pack_move(p.cell.index, s, FLAG_CAPTURE if enemy >> s & 1 else 0)
+				             for s in iter_squares(p.reach(captures_only)))
+			return codes
+
+		enemy_attacks = self.attacked[team.opponent.index]
+		checkers = self.attackers(ksq, team.opponent) if enemy_attacks[ksq] else bitboard.EMPTY
+		pinned = self.pins(team)
+
+		without_king = self.occupied() & ~bit(ksq)
+		xray = bitboard.EMPTY
+		for sq in iter_squares(checkers):
+			xray |= self.attacks(sq, without_king)
+
+		if not checkers:
+			evasions = bitboard.FULL
+		elif bitboard.popcount(checkers) == 1:
+			evasions = bitboard.SEGMENTS[ksq][bitboard.lsb(checkers)] | checkers
+		else:
+			evasions = bitboard.EMPTY
+
+		for p in live:
+			assert p.cell
+			sq = p.cell.index
+			reach = p.reach(captures_only)
+
+			if sq == ksq:
+				reach = sum(bit(s) for s in iter_squares(reach & ~xray) if not enemy_attacks[s])
+			else:
+				reach &= evasions & pinned.get(sq, bitboard.FULL)
+
+			codes.extend(pack_move(sq, s, FLAG_CAPTURE if enemy >> s & 1 else 0) for s in iter_squares(reach))
+
+		return codes
 
-	@classmethod
 	@overload
-	def get_cell(cls, x: int, y: int) -> Board.Cell:
+	def get_cell(self, x: int, y: int) -> Board.Cell:
 		pass
 
-	@classmethod
 	@overload
-	def get_cell(cls, p: Point | str) -> Board.Cell:
+	def get_cell(self, p: Point | str) -> Board.Cell:
 		pass
 
-	@classmethod
 	@overload
-	def get_cell(cls, o: Cell, d: RelativeFreeVector) -> Board.Cell:
+	def get_cell(self, o: Cell, d: RelativeFreeVector) -> Board.Cell:
 		pass
 
-	@classmethod
-	def get_cell(cls, a: Cell | Point | str | int,  # pyright: ignore [reportInconsistentOverload]
+	def get_cell(self, a: Cell | Point | str | int,  # pyright: ignore [reportInconsistentOverload]
 	             b: RelativeFreeVector | int | None = None) -> Board.Cell:  # pyright: ignore [reportInconsistentOverload]
 		if isinstance(a, Board.Cell):
 			assert isinstance(b, RelativeFreeVector)
-			return cls.get_cell(a.get(b))
+			return self.get_cell(a.get(b))
 
 		if isinstance(a, int):
 			assert isinstance(b, int)
-			assert cls.bounds.is_within(Point(a, b))
-			return cls.matrix[b][a]
+			assert bitboard.is_within(a, b)
+			return self.cells[square(a, b)]
 
 		if isinstance(a, str):
-			a = Coords(a)
+			a = Coords.named(a)
 
 		assert isinstance(a, Point)
 
-		return cls.get_cell(a.x, a.y)
+		return self.get_cell(a.x, a.y)
 
-	@classmethod
-	def is_move_possible(cls, origin: Cell, d: RelativeFreeVector):
+	def is_move_possible(self, origin: Cell, d: RelativeFreeVector):
 		assert origin.piece
-		c = cls.get_cell(origin, d)
-		return c is not None and cls.bounds.is_within(c.obj) and (not c.piece or c.piece.team != origin.piece.team)
+		c = self.get_cell(origin, d)
+		return c is not None and self.bounds.is_within(c.obj) and (not c.piece or c.piece.team != origin.piece.team)
 
-	@classmethod
-	def query(cls, a: Letter | int, team: Team | bool | None = None, inv=False) -> list[Board.Cell]:
+	def query(self, a: Letter | int, team: Team | bool | None = None, inv=False) -> list[Board.Cell]:
 		"""
 
 		@param team: if it's a boolean, returns empty cells. If it's None, returns all cells.
 		@param inv: inverts the condition
 		"""
-		l: list[Board.Cell] = []
+		selection = bitboard.FULL if team is None else (
+			~self.occupied() if isinstance(team, bool) else self.occupancy[team.index])
+		if inv:
+			selection = ~selection
+
+		line = bitboard.FILES[a.value] if isinstance(a, Letter) else bitboard.RANKS[a]
+
+		return [self.cells[sq] for sq in iter_squares(line & selection & bitboard.FULL)]
+
+	def occupied(self, team: Team | None = None) -> int:
+		if team is not None:
+			return self.occupancy[team.index]
+		white, black = self.occupancy
+		return white | black
+
+	def piece_at(self, sq: int) -> tuple[Team, PieceKind] | None:
+		"""Reads the team and kind of the piece on the square from the occupancy sets alone."""
+		b = bit(sq)
+		for team in Team:
+			if self.occupancy[team.index] & b:
+				for kind in PieceKind:
+					if self.kinds[kind.index] & b:
+						return team, kind
+		return None
 
-		return [c for c in ([c[a.value] for c in cls.matrix] if isinstance(a, Letter) else cls.matrix[a]) if
-		        (team is None or (
-			        (not c.piece) if isinstance(team, bool) else c.piece and c.piece.team == team)) != inv]
+	def __getitem__(self, c: str) -> Board.Cell:
+		return self.get_cell(c)
 
-	def __class_getitem__(cls, c: str) -> Board.Cell | None:
-		return cls.get_cell(c)
+	def __str__(self):
+		return self.render()
 
-	@classmethod
-	def render(cls, highlight: list[Cell] | None = None):
+	def render(self, highlight: list[Cell] | None = None):
 		if highlight is None:
 			highlight = []
+		marked = 0
+		for c in highlight:
+			marked |= c.mask
 		s = "  "
 
-		for i in range(cls.bounds.width):
+		for i in range(self.bounds.width):
 			s += Colors.gris(Letter(i).name) + " "
 
 		s += '\n'
-		i = cls.bounds.height
+		i = self.bounds.height
 
-		for row in cls.matrix[::-1]:
+		for y in range(self.bounds.height - 1, -1, -1):
 			s += Estils.negreta(Colors.gris(str(i))) + " "
 
-			for p in row:
-				s += ((lambda ic: Estils.invers(ic) if p in highlight else ic)(
-					p.piece.kind.icon[p.piece.team]) + ' ' if p.piece else (
-					Estils.invers(' ') + ' ' if p in highlight else "  "))
+			for x in range(self.bounds.width):
+				b = bit(square(x, y))
+				p = self.piece_at(square(x, y))
+				s += ((lambda ic: Estils.invers(ic) if marked & b else ic)(p[1].icon[p[0]]) + ' ' if p else (
+					Estils.invers(' ') + ' ' if marked & b else "  "))
 
 			i -= 1
 			s += '\n'
@@ -693,15 +1144,12 @@ class Board:
 		return s
 
 
-class BoardAlias:
-	def __getitem__(self, c: str) -> Board.Cell:
-		return Board.get_cell(c)
-
-	def __call__(self) -> type[Board]:
-		return Board
-
-	def __str__(self):
-		return Board.render()
+@cache
+def zobrist_keys(seed: int) -> Zobrist:
+	return Zobrist(seed, range(PIECE_IDS))
 
 
-thisBoard = BoardAlias()
+# Evaluation terms of every piece on every square by piece_id, with the sign of the team: positive for White, negative
+# for Black
+PIECE_VALUES = [[-v if t.mirrored else v for v in evaluation.square_values(k.name, k.score, t.mirrored)]
+                for t in Team for k in PieceKind]
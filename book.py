@@ -0,0 +1,118 @@
+"""
+Opening book: the moves played from every position in a collection of games, weighted by how often they were played.
+The book is a file of fixed-size records sorted by position key, which is mapped in memory and searched by bisection,
+so opening it does not read it.
+
+	python book.py llibre.bin joc1.pych joc2.pych --plies 16
+"""
+
+from __future__ import annotations
+
+import mmap
+import random
+import struct
+from argparse import ArgumentParser
+from collections import Counter
+from itertools import islice
+from typing import Iterable
+
+from board import Board
+from replay import ReplayError, read
+
+# Position key, packed move code and weight
+RECORD = struct.Struct('<QHH')
+MAX_WEIGHT = 0xFFFF
+
+DEFAULT_PATH = "llibre.bin"
+# Moves of every game that go into the book
+DEFAULT_PLIES = 20
+
+
+def build(games: Iterable[str], path: str, plies: int = DEFAULT_PLIES) -> int:
+	"""
+	Writes the book of the .pych game files and returns the number of records. A game is read up to the first line
+	that is not a valid move.
+	"""
+	counts: Counter[tuple[int, int]] = Counter()
+
+	for game in games:
+		board = Board()
+		with open(game, "r") as f:
+			try:
+				for code in islice(read(board, f), plies):
+					counts[board.key, code] += 1
+			except ReplayError:
+				pass
+
+	with open(path, "wb") as f:
+		for (key, code), weight in sorted(counts.items()):
+			f.write(RECORD.pack(key, code, min(weight, MAX_WEIGHT)))
+
+	return len(counts)
+
+
+class Book:
+	def __init__(self, path: str = DEFAULT_PATH):
+		self.file = open(path, "rb")
+		# An empty file cannot be mapped, and has nothing to look up anyway
+		size = self.file.seek(0, 2)
+		self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+		self.size = size // RECORD.size
+
+	def close(self):
+		if self.map is not None:
+			self.map.close()
+		self.file.close()
+
+	def __enter__(self) -> Book:
+		return self
+
+	def __exit__(self, *_):
+		self.close()
+
+	def key_at(self, i: int) -> int:
+		assert self.map is not None
+		return RECORD.unpack_from(self.map, i * RECORD.size)[0]
+
+	def entries(self, key: int) -> list[tuple[int, int]]:
+		"""Codes and weights of the moves played from the position."""
+		if self.map is None:
+			return []
+
+		# First record with the key or a greater one
+		lo, hi = 0, self.size
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if self.key_at(mid) < key:
+				lo = mid + 1
+			else:
+				hi = mid
+
+		found: list[tuple[int, int]] = []
+		for i in range(lo, self.size):
+			k, code, weight = RECORD.unpack_from(self.map, i * RECORD.size)
+			if k != key:
+				break
+			found.append((code, weight))
+		return found
+
+	def choose(self, board: Board, rng: random.Random | None = None) -> int | None:
+		"""
+		Code of a move for the position of the board, picked at random with the weights of the book, or None if the
+		book has no legal move for it.
+		"""
+		legal = board.legal_codes()
+		entries = [(c, w) for c, w in self.entries(board.key) if c in legal]
+		if not entries:
+			return None
+		return (rng or random).choices([c for c, _ in entries], [w for _, w in entries])[0]
+
+
+if __name__ == '__main__':
+	parser = ArgumentParser(description="Construeix un llibre d'obertures a partir de partides desades.")
+	parser.add_argument("book", help="fitxer del llibre")
+	parser.add_argument("games", nargs="+", help="fitxers de partida (.pych)")
+	parser.add_argument("--plies", type=int, default=DEFAULT_PLIES, help="moviments de cada partida que s'hi desen")
+	args = parser.parse_args()
+
+	print(f"Entrades: {build(args.games, args.book, args.plies)}")
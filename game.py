@@ -1,11 +1,15 @@
-from os.path import isfile
+from os.path import isdir, isfile
 from typing import overload
 
 import board
 from board import *
 from forms import Opcio, clear, title, pausar
 from menu import Menu
-from random import choice
+from archive import Archive
+from book import Book, DEFAULT_PATH
+from tablebase import DEFAULT_DIRECTORY, Tablebases
+from search import Search, describe, parallel_search
+from transposition import TranspositionTable
 
 BOUNDS = Bounds(0, 0, 8, 8)
 
@@ -15,18 +19,59 @@ def gameHelp():
 	Colors.cian()
 	print("\tun moviment en notació algebraica (e.g. 'Pa1a2', 'b3', 'Th6')")
 	print(f"\t{Estils.cursiva('?[cel·la]')} per veure moviments possibles d'una peça (e.g. '?a1')")
-	print(f"\t{Estils.cursiva('$')} per fer un moviment aleatori")
+	print(f"\t{Estils.cursiva('$')} perquè el motor faci un moviment")
 	print(f"\t{Estils.cursiva('exit')} per aturar el joc")
 	print(f"\t{Estils.cursiva('h')} o {Estils.cursiva('help')} per mostrar aquesta ajuda")
 	Colors.reset()
 
 
 class Game:
-	def __init__(self):
-		self.turn = Team.WHITE
-		self.pieces = Board.init()
-		self.board = thisBoard
+	def __init__(self, engine_seconds: float = 1.0, engine_jobs: int = 1, book: str | None = DEFAULT_PATH,
+	             tablebases: str | None = DEFAULT_DIRECTORY, archive_path: str | None = None):
+		"""
+		@param engine_seconds: time the engine searches for every move it makes.
+		@param engine_jobs: number of processes the engine searches with.
+		@param book: opening book the engine plays from before searching, if the file exists.
+		@param tablebases: directory of the endgame tables the engine probes, if it exists.
+		@param archive_path: game archive the game is also added to when it is saved, if any, unless it has no moves.
+		"""
+		self.board = Board()
+		self.pieces = self.board.pieces
 		self.history: list[tuple[Team, Move]] = []
+		self.engine_seconds = engine_seconds
+		self.engine_jobs = engine_jobs
+		self.book_path = book if book is not None and isfile(book) else None
+		self.tablebases_path = tablebases if tablebases is not None and isdir(tablebases) else None
+		self.archive_path = archive_path
+
+		# Set up on the first move of the engine and kept until the game ends, so that every search starts from the
+		# results of the previous ones. Games where the engine never plays do not pay for them.
+		self.table: TranspositionTable | None = None
+		self.book: Book | None = None
+		self.tablebases: Tablebases | None = None
+
+	def start_engine(self) -> TranspositionTable:
+		if self.table is None:
+			self.table = TranspositionTable()
+			self.book = Book(self.book_path) if self.book_path else None
+			self.tablebases = Tablebases(self.tablebases_path) if self.tablebases_path else None
+		return self.table
+
+	def close(self):
+		"""Releases the files and the memory of the engine."""
+		if self.book is not None:
+			self.book.close()
+		if self.tablebases is not None:
+			self.tablebases.close()
+		self.table = self.book = self.tablebases = None
+
+	@property
+	def turn(self) -> Team:
+		return self.board.turn
+
+	@property
+	def key(self) -> int:
+		return self.board.key
 
 	def __call__(self) -> bool:
 		clear()
@@ -37,27 +82,7 @@ class Game:
 
 		while True:
 			# look for check
-
-			king = self.turn.get(PieceKind.KING)[0]
-			
-			q = Move.query(str(king.cell), self.turn.opponent)
-			self.turn.in_check = q is not None and len(q) > 0
-	
-
-			# look for checkmate
-			if q is not None and len(q) == 2:
-				can_escape = False
-				for c in king.get_moves():
-					if isinstance(c, Board.Cell):
-						q = Move.query(str(c), self.turn.opponent)
-						if len(q) == 0:
-							can_escape = True
-							break
-				
-					
-				
-			# 1. can the threatening piece be captured?
-
+			self.board.state[self.turn.index].in_check = self.board.in_check(self.turn)
 
 			res = input(Colors.groc_fosc)
 			Colors.reset()
@@ -78,32 +103,57 @@ class Game:
 					with open(f"joc{i}.pych", "w") as f:
 						for m in self.history:
 							f.write(str(m[1]) + '\n')
-
 				except Exception as e:
 					print(Colors.vermell("Hi ha hagut un error"))
 					print(e)
 					print()
 				else:
 					print(Colors.verd(f"S'ha desat el fitxer com a joc{i}.pych."))
+
+				if self.archive_path is not None and self.history:
+					try:
+						with Archive(self.archive_path, writable=True) as games:
+							n = games.append([m.code for _, m in self.history])
+					except Exception as e:
+						print(Colors.vermell("No s'ha pogut afegir la partida a l'arxiu"))
+						print(e)
+						print()
+					else:
+						print(Colors.verd(f"S'ha afegit a l'arxiu {self.archive_path} com a partida {n}."))
 					
+				self.close()
 				pausar()
 				return False
 			elif res == '$':
-				moves = []
-				
-				for k in PieceKind:
-					for p in self.turn.get(k):
-						if p.cell:
-							moves.extend([Move(p, p.cell, c) for c in p.get_moves() if isinstance(c, Board.Cell)])
-				
-				move = choice(moves)
-				assert move is not None
-				move()
+				table = self.start_engine()
+				code = self.book.choose(self.board) if self.book else None
+				if code is not None:
+					move = Move.from_code(self.board, code)
+					self.history.append((self.turn, move))
+					move()
+					clear()
+
+					self.show()
+					print(Colors.gris("Llibre: ") + str(move))
+					continue
+
+				if self.engine_jobs > 1:
+					result = parallel_search(self.board, self.engine_jobs, seconds=self.engine_seconds,
+					                         tablebases=self.tablebases_path)
+				else:
+					result = Search(self.board, table, self.tablebases).run(seconds=self.engine_seconds)
+				if not result.move:
+					print(Colors.groc("Cap moviment possible"))
+					continue
+
+				line = describe(self.board, result)
+				move = Move.from_code(self.board, result.move)
 				self.history.append((self.turn, move))
-				self.turn = Team.BLACK if self.turn == Team.WHITE else Team.WHITE
+				move()
 				clear()
 
 				self.show()
+				print(Colors.gris("Motor: ") + line)
 				
 				
 				
@@ -115,7 +165,7 @@ class Game:
 					if cell.piece:
 						moves = Move.get_moves(cell.piece)
 					else:
-						moves = Move.query(res[1:], self.turn)
+						moves = Move.query(res[1:], self.turn, self.board)
 				except:
 					print(Colors.vermell("Error en cercar els moviments."))
 					continue
@@ -141,10 +191,13 @@ class Game:
 						for m in moves:
 							print(f'\t{m}')
 
+				print(Colors.gris("Peces que ataquen ") + res[1:] + Colors.gris(': ') + ', '.join(
+					f"{t.locale} {self.board.attacked[t.index][cell.index]}" for t in Team))
+
 			else:
 				move = None
 				try:
-					move = Move.from_notation(res, self.turn)
+					move = Move.from_notation(res, self.turn, self.board)
 				except SyntaxError:
 					print(Colors.vermell("Sintaxi invàlida"))
 				except TypeError:
@@ -159,16 +212,19 @@ class Game:
 						print(Colors.vermell(e.message))
 				else:
 					assert move is not None
-					move()
 					self.history.append((self.turn, move))
-					self.turn = Team.BLACK if self.turn == Team.WHITE else Team.WHITE
+					move()
 					clear()
 
 					self.show()
 
 	def show(self, highlight: list[Board.Cell] | None = None, _title="Joc d'escacs"):
 		title(_title)
-		print(Estils.subratllat(Estils.negreta(self.turn.locale)) + ' ' + (
-			"Escac i mat" if Team.WHITE.in_check or Team.BLACK.in_check else ""))
 
-		print(Board.render(highlight))
+		# Moves are only generated to look for checkmate when in check
+		status = ""
+		if self.board.in_check(self.turn):
+			status = "Escac" if self.board.legal_codes() else "Escac i mat"
+		print(Estils.subratllat(Estils.negreta(self.turn.locale)) + ' ' + status)
+
+		print(self.board.render(highlight))
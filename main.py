@@ -59,8 +59,8 @@ class GameMenu(Menu):
 			for line in f:
 				print("Prem enter per veure el següent torn")
 				input()
-				m = Move.from_notation(line.strip(), game.turn)
-				game.turn = Team.WHITE if game.turn is Team.BLACK else Team.BLACK
+				m = Move.from_notation(line.strip(), game.turn, game.board)
+				assert m is not None
 
 				m()
 				clear()
@@ -0,0 +1,115 @@
+"""
+Move generation benchmark and correctness check: counts the leaves of the legal move tree of a position, making and
+taking back every move in place.
+
+	python perft.py 4
+	python perft.py 3 --divide --jobs 8 --moves e4 Cb8c6
+"""
+
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Sequence
+
+from board import Board, Move
+
+
+@dataclass
+class Result:
+	nodes: int
+	seconds: float
+	divide: dict[str, int]
+
+	@property
+	def nps(self) -> float:
+		return self.nodes / self.seconds if self.seconds else float('inf')
+
+
+def perft(board: Board, depth: int) -> int:
+	if depth == 0:
+		return 1
+
+	codes = board.legal_codes()
+	if depth == 1:
+		return len(codes)
+
+	nodes = 0
+	for code in codes:
+		board.make(code)
+		nodes += perft(board, depth - 1)
+		board.unmake()
+
+	return nodes
+
+
+def path(board: Board) -> list[int]:
+	"""Codes of the moves that led to the position, so that workers can rebuild it."""
+	return [played[0] for played in board.played]
+
+
+def rebuild(moves: Sequence[int]) -> Board:
+	board = Board()
+	for code in moves:
+		board.make(code)
+	return board
+
+
+def _divide_job(moves: list[int], depth: int) -> int:
+	return perft(rebuild(moves), depth)
+
+
+def perft_divide(board: Board, depth: int, jobs: int | None = None) -> Result:
+	"""
+	Counts the leaves below every root move separately.
+
+	@param jobs: number of worker processes the root moves are split over. None or 1 counts in this process.
+	"""
+	assert depth >= 1
+	start = perf_counter()
+	divide: dict[str, int] = {}
+
+	if jobs is None or jobs <= 1:
+		for m in board.legal_moves():
+			m()
+			divide[str(m)] = perft(board, depth - 1)
+			m.unmake()
+	else:
+		root = board.legal_moves()
+		prefix = path(board)
+		with ProcessPoolExecutor(jobs) as pool:
+			counts = pool.map(_divide_job, [prefix + [m.code] for m in root], [depth - 1] * len(root))
+			divide = {str(m): n for m, n in zip(root, counts)}
+
+	return Result(sum(divide.values()), perf_counter() - start, divide)
+
+
+def run(board: Board, depth: int) -> Result:
+	start = perf_counter()
+	nodes = perft(board, depth)
+	return Result(nodes, perf_counter() - start, {})
+
+
+if __name__ == '__main__':
+	parser = ArgumentParser(description="Compta les fulles de l'arbre de moviments legals.")
+	parser.add_argument("depth", type=int)
+	parser.add_argument("--divide", action="store_true", help="mostra el recompte de cada moviment inicial")
+	parser.add_argument("--jobs", type=int, default=None, help="processos entre els quals repartir els moviments")
+	parser.add_argument("--moves", nargs="*", default=[], help="moviments fins a la posició inicial")
+	args = parser.parse_args()
+
+	position = Board()
+	for s in args.moves:
+		move = Move.from_notation(s, position.turn, position)
+		assert move is not None
+		move()
+
+	result = perft_divide(position, args.depth, args.jobs) if args.divide or args.jobs else run(position, args.depth)
+
+	for name, count in result.divide.items():
+		print(f"{name}: {count}")
+	print(f"Nodes: {result.nodes}")
+	print(f"Temps: {result.seconds:.3f} s")
+	print(f"Nodes/s: {result.nps:.0f}")
@@ -0,0 +1,239 @@
+"""
+Reading and writing games in PGN. Games are read one at a time from any text stream, so collections of any size are
+read in constant memory. Moves are translated between the English piece letters of PGN and those of the game.
+
+Castling and promotion do not exist in this game, and games that use them are reported as errors.
+
+	python pgn.py partides.pgn --archive partides.pyca
+	python pgn.py --export partides.pyca > partides.pgn
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+from argparse import ArgumentParser
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, TextIO
+
+from board import Board, Move, PieceKind
+from replay import DRAW, UNFINISHED, WHITE_WINS, BLACK_WINS, parse
+
+RESULTS = {WHITE_WINS, BLACK_WINS, DRAW, UNFINISHED}
+
+# Piece letters of PGN and of the game
+ENGLISH = {
+	PieceKind.PAWN: 'P',
+	PieceKind.KNIGHT: 'N',
+	PieceKind.BISHOP: 'B',
+	PieceKind.ROOK: 'R',
+	PieceKind.QUEEN: 'Q',
+	PieceKind.KING: 'K',
+}
+TO_GAME = {e: k.short for k, e in ENGLISH.items()}
+TO_PGN = {k.short: e for k, e in ENGLISH.items()}
+
+# Tags every game must have, in order
+ROSTER = ["Event", "Site", "Date", "Round", "White", "Black", "Result"]
+LINE_WIDTH = 79
+
+TAG = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*]')
+TOKEN = re.compile(r'[{}();]|[^\s{}();]+')
+MOVE_NUMBER = re.compile(r'^\d+\.*')
+SUFFIX = re.compile(r'[+#!?]+$')
+
+
+class PgnError(Exception):
+	def __init__(self, message: str):
+		self.message = message
+
+
+@dataclass
+class PgnGame:
+	headers: dict[str, str] = field(default_factory=dict)
+	# Moves in the notation of the game, and the lines of the stream they were read from
+	moves: list[str] = field(default_factory=list)
+	lines: list[int] = field(default_factory=list)
+	result: str = UNFINISHED
+	# First move that could not be translated, after which the rest of the game is skipped
+	error: str | None = None
+
+	def play(self, board: Board | None = None) -> tuple[Board, list[int]]:
+		"""
+		Makes the moves on the board, a new one if None, and returns it with their codes.
+
+		@raise ReplayError: at the first move that is not valid in the position.
+		"""
+		board = board if board is not None else Board()
+		codes: list[int] = []
+		for text, line in zip(self.moves, self.lines):
+			code = parse(board, line, text, resolve=True).code
+			board.make(code)
+			codes.append(code)
+		return board, codes
+
+
+def translate(san: str) -> str:
+	"""A move of PGN, without move number nor annotations, in the notation of the game."""
+	if san.startswith(('O-O', '0-0')):
+		raise PgnError(f"'{san}': l'enroc no existeix en aquest joc")
+	if '=' in san:
+		raise PgnError(f"'{san}': la promoció no existeix en aquest joc")
+
+	if san[:1] in TO_GAME:
+		return TO_GAME[san[0]] + san[1:]
+	# Pawn moves have no letter in PGN, but the game would also consider other pieces reaching the square
+	return PieceKind.PAWN.short + san
+
+
+def read_games(stream: Iterable[str]) -> Iterator[PgnGame]:
+	"""Yields the games of the stream one by one, reading it line by line."""
+	game: PgnGame | None = None
+	in_movetext = False
+	in_comment = False
+	variations = 0
+
+	for number, line in enumerate(stream, 1):
+		stripped = line.strip()
+		if not stripped or stripped.startswith('%'):
+			continue
+
+		if not in_comment and not variations and stripped.startswith('['):
+			match = TAG.match(stripped)
+			if match:
+				if game is not None and in_movetext:
+					yield game
+					game = None
+				if game is None:
+					game = PgnGame()
+					in_movetext = False
+				game.headers[match[1]] = match[2].replace('\\"', '"').replace('\\\\', '\\')
+				continue
+
+		if game is None:
+			game = PgnGame()
+		in_movetext = True
+
+		for token in TOKEN.findall(line):
+			if in_comment:
+				in_comment = token != '}'
+				continue
+			if token == '{':
+				in_comment = True
+			elif token == ';':
+				break
+			elif token == '(':
+				variations += 1
+			elif token == ')':
+				variations = max(0, variations - 1)
+			elif variations:
+				continue
+			elif token in RESULTS:
+				game.result = token
+				yield game
+				game = None
+				in_movetext = False
+				break
+			else:
+				token = SUFFIX.sub('', MOVE_NUMBER.sub('', token))
+				if not token or token.startswith('$') or token == 'e.p.' or game.error is not None:
+					continue
+				try:
+					game.moves.append(translate(token))
+					game.lines.append(number)
+				except PgnError as e:
+					game.error = e.message
+
+	if game is not None and (game.moves or game.headers):
+		yield game
+
+
+def _tag(value: str) -> str:
+	return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def write_game(out: TextIO, moves: Iterable[Move | str], headers: dict[str, str] | None = None,
+               result: str = UNFINISHED):
+	"""
+	Writes a game as the moves come, in the long algebraic notation of Move.__str__ with English piece letters.
+
+	@param moves: the moves, or their notation in the game.
+	"""
+	tags = {t: "????.??.??" if t == "Date" else "?" for t in ROSTER}
+	tags.update(headers or {})
+	tags["Result"] = result
+
+	for name in ROSTER + [t for t in tags if t not in ROSTER]:
+		out.write(f'[{name} "{_tag(tags[name])}"]\n')
+	out.write('\n')
+
+	width = 0
+
+	def token(s: str):
+		nonlocal width
+		if width and width + 1 + len(s) > LINE_WIDTH:
+			out.write('\n')
+			width = 0
+		elif width:
+			out.write(' ')
+			width += 1
+		out.write(s)
+		width += len(s)
+
+	for i, move in enumerate(moves):
+		text = str(move)
+		if text[0] == PieceKind.PAWN.short:
+			text = text[1:]
+		elif text[0] in TO_PGN:
+			text = TO_PGN[text[0]] + text[1:]
+
+		if i % 2 == 0:
+			token(f"{i // 2 + 1}.")
+		token(text)
+
+	token(result)
+	out.write('\n\n')
+
+
+def write_history(out: TextIO, history: Iterable[tuple[object, Move]], headers: dict[str, str] | None = None,
+                  result: str = UNFINISHED):
+	"""Writes the history of a Game."""
+	write_game(out, (m for _, m in history), headers, result)
+
+
+if __name__ == '__main__':
+	from archive import Archive
+	from replay import ReplayError
+	from replay import result as outcome
+	from search import notation
+
+	parser = ArgumentParser(description="Llegeix i escriu partides en PGN.")
+	parser.add_argument("source", nargs="?", default=None, help="fitxer PGN que es llegeix")
+	parser.add_argument("--archive", default=None, help="arxiu de partides on s'afegeixen les partides llegides")
+	parser.add_argument("--export", default=None, help="arxiu de partides que s'escriu en PGN")
+	args = parser.parse_args()
+
+	if args.source:
+		total = errors = 0
+		games = Archive(args.archive, writable=True) if args.archive else None
+		with open(args.source, "r", encoding="utf-8", errors="replace") as f:
+			for total, g in enumerate(read_games(f), 1):
+				try:
+					if g.error is not None:
+						raise PgnError(g.error)
+					_, codes = g.play()
+				except (PgnError, ReplayError) as e:
+					errors += 1
+					print(f"Partida {total}: {e.message if isinstance(e, PgnError) else e}", file=sys.stderr)
+					continue
+				if games is not None:
+					games.append(codes)
+		if games is not None:
+			games.close()
+		print(f"Partides: {total}, amb errors: {errors}", file=sys.stderr)
+
+	if args.export:
+		with Archive(args.export) as games:
+			for n, codes in enumerate(games):
+				board = games.board(n)
+				write_game(sys.stdout, notation(Board(), codes), {"Round": str(n + 1)}, outcome(board))
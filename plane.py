@@ -31,7 +31,7 @@ class Unit(int):
 		return Unit(super().__neg__())
 
 
-@dataclass
+@dataclass(slots=True)
 class Point:
 	x: int
 	y: int
@@ -89,6 +89,7 @@ class Bounds:
 
 
 class Vector(ABC):
+	__slots__ = ()
 
 	@abstractmethod
 	def __init__(self) -> None:
@@ -132,6 +133,8 @@ class Vector(ABC):
 
 
 class FreeVector(Vector):
+	__slots__ = ('dx', 'dy')
+
 	def __init__(self, dx: int, dy: int):
 		self.dx = dx
 		self.dy = dy
@@ -182,6 +185,8 @@ class FreeVector(Vector):
 
 
 class FixedVector(Vector):
+	__slots__ = ('x1', 'y1', 'x2', 'y2', 'start_ref', 'end_ref')
+
 	def __init__(self, x1: int, y1: int, x2: int, y2: int, start_ref: Ref[Point] | None = None,
 	             end_ref: Ref[Point] | None = None) -> None:
 		self.x1 = x1
@@ -402,6 +407,7 @@ class CardinalDirection(Enum):
 
 
 class Ref(Generic[Obj]):
+	__slots__ = ('name', 'obj')
 
 	# Functional references
 
@@ -436,9 +442,6 @@ class Ref(Generic[Obj]):
 		return obj.obj if isinstance(obj, Ref) else obj
 
 	def __init__(self, name: str, obj: Obj) -> None:
-		setattr(obj, "name", name)
-		setattr(obj, "name", self)
-
 		self.name = name
 		self.obj = obj
 
@@ -0,0 +1,140 @@
+"""
+Replays saved games (.pych files, one move in algebraic notation per line) without drawing them, to check them and to
+collect their final positions. Many files are spread over worker processes.
+
+	python replay.py joc*.pych --jobs 8
+"""
+
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Sequence
+
+from board import Board, Move, Team
+
+# Results, written as in PGN
+WHITE_WINS = "1-0"
+BLACK_WINS = "0-1"
+DRAW = "1/2-1/2"
+UNFINISHED = "*"
+
+
+class ReplayError(Exception):
+	def __init__(self, line: int, text: str, message: str):
+		super().__init__(f"Línia {line}: '{text}': {message}")
+		self.line = line
+		self.text = text
+		self.message = message
+
+
+def read(board: Board, lines: Iterable[str]) -> Iterator[int]:
+	"""
+	Yields the code of every move of the lines, each one before making it on the board. Blank lines are skipped.
+
+	@raise ReplayError: at the first line that is not a valid move.
+	"""
+	for number, line in enumerate(lines, 1):
+		text = line.strip()
+		if not text:
+			continue
+
+		code = parse(board, number, text).code
+		yield code
+		board.make(code)
+
+
+def parse(board: Board, number: int, text: str, resolve: bool = False) -> Move:
+	"""
+	The move of the text in the position of the board.
+
+	@param number: line of the text, for the error.
+	@param resolve: an ambiguous move is accepted when only one of its candidates is legal, since notations that
+	leave out the squares that are not needed to tell legal moves apart, like PGN, do not count pinned pieces.
+	@raise ReplayError: if the text is not a valid move.
+	"""
+	try:
+		move = Move.from_notation(text, board.turn, board)
+	except Move.AmbiguousMoveError as e:
+		legal = board.legal_codes() if resolve else ()
+		candidates = [m for m in e.moves if m.code in legal]
+		if len(candidates) != 1:
+			raise ReplayError(number, text, "Moviment ambigu") from None
+		move = candidates[0]
+	except Move.NotationBaseError as e:
+		raise ReplayError(number, text, e.message) from None
+	except NameError:
+		raise ReplayError(number, text, "Peça desconeguda") from None
+	except (SyntaxError, TypeError):
+		raise ReplayError(number, text, "Sintaxi invàlida") from None
+	if move is None:
+		raise ReplayError(number, text, "Moviment invàlid")
+
+	return move
+
+
+def result(board: Board) -> str:
+	if board.legal_codes():
+		return UNFINISHED
+	if not board.in_check(board.turn):
+		return DRAW
+	return BLACK_WINS if board.turn is Team.WHITE else WHITE_WINS
+
+
+@dataclass
+class Replay:
+	path: str
+	# Codes of the moves replayed, up to the first error. The final position is rebuilt by making them.
+	moves: list[int] = field(default_factory=list)
+	key: int = 0
+	result: str = UNFINISHED
+	# Message of the error the replay stopped at, and its line
+	error: str | None = None
+	error_line: int | None = None
+
+
+def replay_file(path: str) -> Replay:
+	board = Board()
+	replay = Replay(path)
+
+	try:
+		with open(path, "r") as f:
+			replay.moves.extend(read(board, f))
+	except ReplayError as e:
+		replay.error = str(e)
+		replay.error_line = e.line
+	except OSError as e:
+		replay.error = str(e)
+
+	replay.key = board.key
+	replay.result = result(board)
+	return replay
+
+
+def replay_all(paths: Sequence[str], jobs: int | None = None, chunksize: int = 16) -> Iterator[Replay]:
+	"""
+	Replays the files in order. With more than one job they are replayed by that many worker processes, in chunks.
+	"""
+	if jobs is None or jobs <= 1:
+		yield from map(replay_file, paths)
+		return
+
+	with ProcessPoolExecutor(jobs) as pool:
+		yield from pool.map(replay_file, paths, chunksize=chunksize)
+
+
+if __name__ == '__main__':
+	parser = ArgumentParser(description="Reprodueix partides desades sense mostrar-les.")
+	parser.add_argument("games", nargs="+", help="fitxers de partida (.pych)")
+	parser.add_argument("--jobs", type=int, default=None, help="processos entre els quals repartir els fitxers")
+	args = parser.parse_args()
+
+	errors = 0
+	for r in replay_all(args.games, args.jobs):
+		print(f"{r.path}: {len(r.moves)} moviments, {r.result}, clau {r.key:016x}")
+		if r.error is not None:
+			errors += 1
+			print(f"\tError: {r.error}")
+
+	print(f"Partides: {len(args.games)}, amb errors: {errors}")
@@ -0,0 +1,403 @@
+"""
+Engine for the automated player: negamax alpha-beta search with iterative deepening over packed move codes, with
+results cached in a transposition table.
+
+	python search.py --depth 4
+	python search.py --time 2 --jobs 8 --moves e4 Pe7e5
+"""
+
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Callable, Iterator, Sequence
+
+import bitboard
+from board import FLAG_CAPTURE, Board, Move, PieceKind, move_dest, move_origin
+from book import Book
+from evaluation import UNIT
+from perft import path, rebuild
+from tablebase import DRAW, Tablebases, decode
+from transposition import Bound, TranspositionTable
+
+# Mate scores count down with the plies it takes to deliver it
+MATE = 100_000
+INFINITY = MATE + 1
+MAX_PLY = 128
+
+
+class Timeout(Exception):
+	pass
+
+
+@dataclass
+class Result:
+	move: int  # 0 when there is no legal move
+	score: int
+	depth: int
+	pv: list[int] = field(default_factory=list)
+	nodes: int = 0
+	seconds: float = 0.0
+
+	@property
+	def nps(self) -> float:
+		return self.nodes / self.seconds if self.seconds else float('inf')
+
+	@property
+	def mate_in(self) -> int | None:
+		"""Moves until mate, negative when the side to move is the one getting mated."""
+		if abs(self.score) < MATE - MAX_PLY:
+			return None
+		plies = MATE - abs(self.score)
+		return (plies + 1) // 2 if self.score > 0 else -(plies // 2)
+
+
+class MoveOrder:
+	"""
+	Order in which a search tries the moves of a node, best first, so that cutoffs come early: the move stored for the
+	position in the transposition table, then captures by most valuable victim and least valuable attacker, then the
+	quiet moves that caused a cutoff at the same ply (killers) and the rest of quiet moves by how often moves of the
+	same kind to the same square caused cutoffs (history).
+	"""
+
+	KILLERS = 2
+
+	def __init__(self):
+		self.killers = [[0] * self.KILLERS for _ in range(MAX_PLY + 1)]
+		self.history = {k: [0] * bitboard.SQUARES for k in PieceKind}
+
+	def moves(self, board: Board, codes: Sequence[int], ply: int, hash_move: int = 0) -> Iterator[int]:
+		"""Yields the codes in order. Every stage is only sorted when the previous ones did not cause a cutoff."""
+		cells = board.cells
+		if hash_move and hash_move in codes:
+			yield hash_move
+
+		captures = [c for c in codes if c & FLAG_CAPTURE and c != hash_move]
+		captures.sort(key=lambda c: cells[move_dest(c)].piece.kind.score * 16 -  # type: ignore
+		                            cells[move_origin(c)].piece.kind.score, reverse=True)  # type: ignore
+		yield from captures
+
+		quiet = [c for c in codes if not c & FLAG_CAPTURE and c != hash_move]
+		killers = [k for k in self.killers[ply] if k and k != hash_move and k in quiet]
+		yield from killers
+
+		history = self.history
+		quiet = [c for c in quiet if c not in killers]
+		quiet.sort(key=lambda c: history[cells[move_origin(c)].piece.kind][move_dest(c)], reverse=True)  # type: ignore
+		yield from quiet
+
+	def cutoff(self, board: Board, code: int, ply: int, depth: int):
+		"""Records a quiet move that caused a cutoff. The board must be in the position the move was tried from."""
+		if code & FLAG_CAPTURE:
+			return
+
+		killers = self.killers[ply]
+		if killers[0] != code:
+			killers[1:] = killers[:-1]
+			killers[0] = code
+
+		piece = board.cells[move_origin(code)].piece
+		assert piece is not None
+		self.history[piece.kind][move_dest(code)] += depth * depth
+
+	def age(self):
+		"""Forgets the killers and halves the history, which belong to the previous search."""
+		for killers in self.killers:
+			killers[:] = [0] * self.KILLERS
+		for counts in self.history.values():
+			counts[:] = [n // 2 for n in counts]
+
+
+class Search:
+	"""
+	Searches the position of a board in place: moves are made and taken back on it, and it is left as it was. The
+	transposition table can be shared between searches to keep its results from one move to the next.
+	"""
+
+	# Nodes between clock checks
+	CHECK_EVERY = 1024
+
+	def __init__(self, board: Board, table: TranspositionTable | None = None, tablebases: Tablebases | None = None):
+		self.board = board
+		self.table = table if table is not None else TranspositionTable()
+		self.tablebases = tablebases
+		self.nodes = 0
+		self.deadline: float | None = None
+		self.pv: list[list[int]] = [[] for _ in range(MAX_PLY + 1)]
+		# Moves the root is restricted to, when the root moves are split between several searches
+		self.root_moves: Sequence[int] | None = None
+		self.order = MoveOrder()
+
+	def run(self, depth: int | None = None, seconds: float | None = None,
+	        on_iteration: Callable[[Result], None] | None = None, moves: Sequence[int] | None = None) -> Result:
+		"""
+		Searches one ply deeper every iteration until the depth is reached or the time runs out, and returns the
+		result of the last iteration completed. The first iteration always completes.
+
+		@param on_iteration: called with the result of every completed iteration.
+		@param moves: codes of the root moves to search. All legal moves if None.
+		"""
+		assert depth is not None or seconds is not None
+		max_depth = min(depth if depth is not None else MAX_PLY, MAX_PLY)
+		start = perf_counter()
+		self.nodes = 0
+		self.deadline = None
+		self.root_moves = moves
+		self.order.age()
+		root = len(self.board.played)
+
+		result = Result(0, 0, 0)
+		for d in range(1, max_depth + 1):
+			try:
+				score = self.negamax(d, -INFINITY, INFINITY, 0)
+			except Timeout:
+				self.unwind(len(self.board.played) - root)
+				break
+
+			pv = list(self.pv[0])
+			result = Result(pv[0] if pv else 0, score, d, pv, self.nodes, perf_counter() - start)
+			if on_iteration:
+				on_iteration(result)
+
+			if not pv or abs(score) >= MATE - MAX_PLY:
+				break
+			if seconds is not None:
+				self.deadline = start + seconds
+
+		result.nodes = self.nodes
+		result.seconds = perf_counter() - start
+		return result
+
+	def negamax(self, depth: int, alpha: int, beta: int, ply: int) -> int:
+		board = self.board
+		self.pv[ply].clear()
+		self.visit()
+
+		if ply > 0 and self.tablebases is not None:
+			value = self.tablebases.probe(board)
+			if value is not None:
+				return from_tablebase(value, ply)
+
+		key = board.key
+		entry = self.table.probe(key)
+		hash_move = 0
+		if entry is not None:
+			hash_move = entry.move
+			if ply > 0 and entry.depth >= depth:
+				score = from_table(entry.score, ply)
+				if entry.bound is Bound.EXACT or (entry.bound is Bound.LOWER and score >= beta) or (
+						entry.bound is Bound.UPPER and score <= alpha):
+					return score
+
+		if depth == 0:
+			return self.quiesce(alpha, beta, ply)
+		if ply >= MAX_PLY:
+			return board.evaluate()
+
+		codes = board.legal_codes()
+		if not codes:
+			return -MATE + ply if board.in_check(board.turn) else 0
+		if ply == 0 and self.root_moves is not None:
+			codes = array('H', (c for c in codes if c in self.root_moves))
+
+		original_alpha = alpha
+		best_score = -INFINITY
+		best_move = 0
+		for code in self.order.moves(board, codes, ply, hash_move):
+			board.make(code)
+			score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+			board.unmake()
+
+			if score > best_score:
+				best_score = score
+				best_move = code
+				if score > alpha:
+					alpha = score
+					self.pv[ply] = [code, *self.pv[ply + 1]]
+					if alpha >= beta:
+						self.order.cutoff(board, code, ply, depth)
+						break
+
+		bound = Bound.LOWER if best_score >= beta else Bound.EXACT if best_score > original_alpha else Bound.UPPER
+		self.table.store(key, depth, bound, to_table(best_score, ply), best_move)
+		return best_score
+
+	def quiesce(self, alpha: int, beta: int, ply: int) -> int:
+		"""
+		Searches only captures past the horizon, so that positions are not scored in the middle of an exchange. The
+		side to move may stand pat with the static score instead of capturing, unless it is in check, in which case
+		all evasions are searched.
+		"""
+		board = self.board
+		self.visit()
+		if ply >= MAX_PLY:
+			return board.evaluate()
+
+		in_check = board.in_check(board.turn)
+		if in_check:
+			best = -INFINITY
+		else:
+			best = board.evaluate()
+			if best >= beta:
+				return best
+			alpha = max(alpha, best)
+
+		codes = board.legal_codes(captures_only=not in_check)
+		if in_check and not codes:
+			return -MATE + ply
+
+		for code in self.order.moves(board, codes, ply):
+			board.make(code)
+			score = -self.quiesce(-beta, -alpha, ply + 1)
+			board.unmake()
+
+			if score > best:
+				best = score
+				if score > alpha:
+					alpha = score
+					if alpha >= beta:
+						break
+
+		return best
+
+	def visit(self):
+		self.nodes += 1
+		if self.deadline is not None and self.nodes % self.CHECK_EVERY == 0 and perf_counter() > self.deadline:
+			raise Timeout
+
+	def unwind(self, plies: int):
+		"""Takes back the moves left made by an interrupted search."""
+		for _ in range(plies):
+			self.board.unmake()
+
+
+def _search_job(moves: list[int], root_moves: list[int], depth: int | None, seconds: float | None,
+                size_mb: float, tablebases: str | None) -> tuple[list[Result], int]:
+	"""Results of every iteration completed, and the nodes searched in all of them and the interrupted one."""
+	tables = Tablebases(tablebases) if tablebases is not None else None
+	iterations: list[Result] = []
+	last = Search(rebuild(moves), TranspositionTable(size_mb), tables).run(depth, seconds, iterations.append,
+	                                                                        root_moves)
+	return iterations, last.nodes
+
+
+def parallel_search(board: Board, jobs: int, depth: int | None = None, seconds: float | None = None,
+                    size_mb: float = 16, tablebases: str | None = None) -> Result:
+	"""
+	Splits the root moves between worker processes, each searching its share with its own transposition table of
+	the given size, and keeps the best result. The workers share nothing, so the nodes searched per second grow with
+	the number of workers.
+
+	Under a time budget the workers may complete different depths, and scores are only comparable at the same depth,
+	so the results are compared at the deepest depth that every worker completed. Mate scores are exact at any depth,
+	so a worker that stopped on one takes part with it.
+
+	@param tablebases: directory of the endgame tables the workers probe.
+	"""
+	start = perf_counter()
+	root = list(board.legal_codes())
+	jobs = max(1, min(jobs, len(root)))
+	if jobs == 1:
+		tables = Tablebases(tablebases) if tablebases is not None else None
+		return Search(board, TranspositionTable(size_mb), tables).run(depth, seconds)
+
+	prefix = path(board)
+	shares = [root[i::jobs] for i in range(jobs)]
+	with ProcessPoolExecutor(jobs) as pool:
+		results = list(pool.map(_search_job, [prefix] * jobs, shares, [depth] * jobs, [seconds] * jobs,
+		                        [size_mb] * jobs, [tablebases] * jobs))
+
+	def decided(r: Result) -> bool:
+		return abs(r.score) >= MATE - MAX_PLY
+
+	finals = [iterations[-1] for iterations, _ in results]
+	common = min((r.depth for r in finals if not decided(r)), default=max(r.depth for r in finals))
+	# Iterations go one ply deeper each time from depth 1, so the result at a depth is found by position
+	chosen = [final if decided(final) else iterations[common - 1] for (iterations, _), final in zip(results, finals)]
+
+	best = max(chosen, key=lambda r: r.score)
+	best.depth = common
+	best.nodes = sum(nodes for _, nodes in results)
+	best.seconds = perf_counter() - start
+	return best
+
+
+def to_table(score: int, ply: int) -> int:
+	"""Mate scores are stored relative to the node, so that they stay right wherever the position is found again."""
+	if score >= MATE - MAX_PLY:
+		return score + ply
+	if score <= -MATE + MAX_PLY:
+		return score - ply
+	return score
+
+
+def from_table(score: int, ply: int) -> int:
+	if score >= MATE - MAX_PLY:
+		return score - ply
+	if score <= -MATE + MAX_PLY:
+		return score + ply
+	return score
+
+
+def from_tablebase(value: int, ply: int) -> int:
+	if value == DRAW:
+		return 0
+	return MATE - ply - decode(value) if value > 0 else -MATE + ply + decode(value)
+
+
+def notation(board: Board, codes: Sequence[int]) -> list[str]:
+	"""The moves written out, made one after the other from the position of the board, which is left as it was."""
+	names: list[str] = []
+	for code in codes:
+		names.append(str(Move.from_code(board, code)))
+		board.make(code)
+	for _ in codes:
+		board.unmake()
+	return names
+
+
+def describe(board: Board, result: Result) -> str:
+	mate = result.mate_in
+	score = f"mat en {mate}" if mate is not None else f"{result.score / UNIT:+.2f}"
+	return f"profunditat {result.depth}, {score}, {result.nodes} nodes: {' '.join(notation(board, result.pv))}"
+
+
+if __name__ == '__main__':
+	parser = ArgumentParser(description="Cerca el millor moviment d'una posició.")
+	parser.add_argument("--depth", type=int, default=None, help="profunditat màxima")
+	parser.add_argument("--time", type=float, default=None, help="temps màxim en segons")
+	parser.add_argument("--hash", type=float, default=16, help="mida de la taula de transposició en MB")
+	parser.add_argument("--jobs", type=int, default=1, help="processos entre els quals repartir els moviments")
+	parser.add_argument("--book", default=None, help="llibre d'obertures que es consulta abans de cercar")
+	parser.add_argument("--tablebases", default=None, help="directori de les taules de finals")
+	parser.add_argument("--moves", nargs="*", default=[], help="moviments fins a la posició inicial")
+	args = parser.parse_args()
+
+	position = Board()
+	for s in args.moves:
+		move = Move.from_notation(s, position.turn, position)
+		assert move is not None
+		move()
+
+	if args.book:
+		with Book(args.book) as opening:
+			code = opening.choose(position)
+		if code is not None:
+			print(f"Moviment del llibre: {Move.from_code(position, code)}")
+			raise SystemExit
+
+	limit = args.depth if args.depth or args.time else 4
+	if args.jobs > 1:
+		found = parallel_search(position, args.jobs, limit, args.time, args.hash, args.tablebases)
+		print(describe(position, found))
+	else:
+		endgames = Tablebases(args.tablebases) if args.tablebases else None
+		found = Search(position, TranspositionTable(args.hash), endgames).run(limit, args.time,
+		                                                                      lambda r: print(describe(position, r)))
+
+	print(f"Millor moviment: {Move.from_code(position, found.move) if found.move else '-'}")
+	print(f"Temps: {found.seconds:.3f} s")
+	print(f"Nodes/s: {found.nps:.0f}")
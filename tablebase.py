@@ -0,0 +1,331 @@
+"""
+Endgame tablebases: the result and distance to mate of every position with a given set of pieces and no pawns,
+worked out backwards from the mates by retrograde analysis. Every table is a file of one signed byte per position,
+indexed by the squares of the pieces and the side to move, which is mapped in memory to be probed.
+
+Materials are named with the letters of the pieces, those of White first, e.g. RDvR for king and queen against king.
+
+	python tablebase.py RDvR RTvR --dir taules
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+from argparse import ArgumentParser
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Iterator
+
+import bitboard
+from bitboard import bit, iter_squares
+from board import Board, PieceKind, Team
+
+MAGIC = b'PYTB'
+EXTENSION = ".tb"
+DEFAULT_DIRECTORY = "taules"
+
+# Values of the positions. Positive values are mates in that many moves for the side to move, negative values are
+# mates against it, -1 meaning that it is already mated. Positions that cannot happen are marked as invalid.
+DRAW = 0
+INVALID = -128
+MAX_PLIES = 253
+
+ORDER = {k: i for i, k in enumerate(PieceKind)}
+
+
+def encode(plies: int, win: bool) -> int:
+	return (plies + 1) // 2 if win else -(plies // 2 + 1)
+
+
+def decode(value: int) -> int:
+	"""Plies until mate, from the value of a won or lost position."""
+	return 2 * value - 1 if value > 0 else 2 * (-value - 1)
+
+
+@dataclass(frozen=True)
+class Material:
+	# Kings first and then the rest by decreasing value, those of White before those of Black
+	pieces: tuple[tuple[Team, PieceKind], ...]
+
+	@staticmethod
+	def canonical(pieces: list[tuple[Team, PieceKind]]) -> Material:
+		return Material(tuple(sorted(pieces, key=lambda p: (p[0].mirrored, -ORDER[p[1]]))))
+
+	@staticmethod
+	def parse(name: str) -> Material:
+		white, _, black = name.partition('v')
+		pieces: list[tuple[Team, PieceKind]] = []
+		for team, letters in ((Team.WHITE, white), (Team.BLACK, black)):
+			for s in letters:
+				kind = PieceKind.from_letter(s)
+				if kind is None:
+					raise ValueError(f"Peça desconeguda: '{s}'")
+				pieces.append((team, kind))
+
+		material = Material.canonical(pieces)
+		material.check()
+		return material
+
+	@staticmethod
+	def of(board: Board) -> tuple[Material, list[int]] | None:
+		"""Material of the position and the squares of its pieces in order, or None if it has pawns."""
+		if board.kinds[PieceKind.PAWN.index]:
+			return None
+
+		pieces: list[tuple[Team, PieceKind]] = []
+		squares: list[int] = []
+		for team in Team:
+			for kind in sorted(PieceKind, key=lambda k: -ORDER[k]):
+				for sq in iter_squares(board.kinds[kind.index] & board.occupancy[team.index]):
+					pieces.append((team, kind))
+					squares.append(sq)
+		return Material(tuple(pieces)), squares
+
+	def check(self):
+		for team in Team:
+			if sum(1 for t, k in self.pieces if t is team and k is PieceKind.KING) != 1:
+				raise ValueError("Cada equip ha de tenir un rei")
+		if any(k is PieceKind.PAWN for _, k in self.pieces):
+			raise ValueError("Les taules no admeten peons")
+
+	@property
+	def name(self) -> str:
+		return 'v'.join(''.join(k.short for t, k in self.pieces if t is team) for team in Team)
+
+	@property
+	def size(self) -> int:
+		return 2 * bitboard.SQUARES ** len(self.pieces)
+
+	def without(self, i: int) -> Material:
+		return Material(self.pieces[:i] + self.pieces[i + 1:])
+
+	def index(self, squares: list[int] | tuple[int, ...], side: Team) -> int:
+		idx = 1 if side.mirrored else 0
+		for sq in reversed(squares):
+			idx = idx * bitboard.SQUARES + sq
+		return idx
+
+	def position(self, idx: int) -> tuple[list[int], Team]:
+		squares: list[int] = []
+		for _ in self.pieces:
+			idx, sq = divmod(idx, bitboard.SQUARES)
+			squares.append(sq)
+		return squares, Team.BLACK if idx else Team.WHITE
+
+
+class Generator:
+	"""Builds the tables of materials, and those of the materials they turn into by capturing, in memory."""
+
+	def __init__(self):
+		self.tables: dict[Material, array[int]] = {}
+
+	def attacked(self, material: Material, squares: list[int], sq: int, team: Team, occupied: int,
+	             captured: int = -1) -> bool:
+		"""Whether any piece of the team but the captured one attacks the square."""
+		target = bit(sq)
+		for i, (t, kind) in enumerate(material.pieces):
+			if t is team and i != captured:
+				s = squares[i]
+				if (kind.attacks[t.index][s] | bitboard.slide(kind.slides[t.index], s, occupied)) & target:
+					return True
+		return False
+
+	def is_valid(self, material: Material, squares: list[int], side: Team) -> bool:
+		if len(set(squares)) != len(squares):
+			return False
+		# The side that has just moved cannot have left its king in check
+		occupied = sum(bit(s) for s in squares)
+		king = squares[material.pieces.index((side.opponent, PieceKind.KING))]
+		return not self.attacked(material, squares, king, side, occupied)
+
+	def moves(self, material: Material, squares: list[int], side: Team) -> Iterator[tuple[list[int], int]]:
+		"""Squares after every legal move of the side, and the piece captured by it, or -1."""
+		occupied = 0
+		own = 0
+		for (team, _), s in zip(material.pieces, squares):
+			occupied |= bit(s)
+			if team is side:
+				own |= bit(s)
+		king = material.pieces.index((side, PieceKind.KING))
+
+		for i, (team, kind) in enumerate(material.pieces):
+			if team is not side:
+				continue
+			sq = squares[i]
+			targets = (kind.leaps[team.index][sq] | bitboard.slide(kind.slides[team.index], sq, occupied)) & ~own
+			for to in iter_squares(targets):
+				captured = squares.index(to) if occupied & bit(to) else -1
+				after = list(squares)
+				after[i] = to
+				if not self.attacked(material, after, after[king], side.opponent, occupied & ~bit(sq) | bit(to),
+				                     captured):
+					yield after, captured
+
+	def unmoves(self, material: Material, squares: list[int], side: Team) -> Iterator[int]:
+		"""
+		Indices of the positions the side that has just moved could have come from without capturing. Pieces other
+		than pawns move the same way forwards and backwards, so these are its moves to empty squares.
+		"""
+		mover = side.opponent
+		occupied = sum(bit(s) for s in squares)
+		for i, (team, kind) in enumerate(material.pieces):
+			if team is not mover:
+				continue
+			sq = squares[i]
+			t = team.index
+			for origin in iter_squares((kind.leaps[t][sq] | bitboard.slide(kind.slides[t], sq, occupied)) & ~occupied):
+				before = list(squares)
+				before[i] = origin
+				yield material.index(before, mover)
+
+	def generate(self, material: Material) -> array[int]:
+		if material in self.tables:
+			return self.tables[material]
+
+		children = {i: (material.without(i), self.generate(material.without(i))) for i, (_, kind) in
+		            enumerate(material.pieces) if kind is not PieceKind.KING}
+
+		size = material.size
+		values = array('b', bytes(size))
+		resolved = bytearray(size)
+		# Quiet moves not yet known to lose, whether a capture draws or wins, and the plies of the longest lost capture
+		remaining = array('H', bytes(2 * size))
+		escapes = bytearray(size)
+		floor = array('B', bytes(size))
+		wins: dict[int, list[int]] = defaultdict(list)
+		losses: dict[int, list[int]] = defaultdict(list)
+
+		for idx in range(size):
+			squares, side = material.position(idx)
+			if not self.is_valid(material, squares, side):
+				values[idx] = INVALID
+				resolved[idx] = 1
+				continue
+
+			quiet = 0
+			any_move = False
+			for after, captured in self.moves(material, squares, side):
+				any_move = True
+				if captured < 0:
+					quiet += 1
+					continue
+
+				child, table = children[captured]
+				value = table[child.index(after[:captured] + after[captured + 1:], side.opponent)]
+				if value == DRAW:
+					escapes[idx] = 1
+				elif value < 0:
+					wins[decode(value) + 1].append(idx)
+					escapes[idx] = 1
+				else:
+					floor[idx] = max(floor[idx], min(decode(value) + 1, MAX_PLIES))
+
+			if not any_move:
+				king = squares[material.pieces.index((side, PieceKind.KING))]
+				occupied = sum(bit(s) for s in squares)
+				if self.attacked(material, squares, king, side.opponent, occupied):
+					losses[0].append(idx)
+				else:
+					resolved[idx] = 1
+			else:
+				remaining[idx] = quiet
+				if not quiet and not escapes[idx]:
+					losses[floor[idx]].append(idx)
+
+		# Positions are settled in order of plies to mate, so that each gets the shortest win or the longest loss
+		for plies in range(MAX_PLIES + 1):
+			for idx in losses.pop(plies, []):
+				if resolved[idx]:
+					continue
+				resolved[idx] = 1
+				values[idx] = encode(plies, False)
+				for prev in self.unmoves(material, *material.position(idx)):
+					if not resolved[prev]:
+						wins[plies + 1].append(prev)
+
+			for idx in wins.pop(plies, []):
+				if resolved[idx]:
+					continue
+				resolved[idx] = 1
+				values[idx] = encode(plies, True)
+				for prev in self.unmoves(material, *material.position(idx)):
+					if resolved[prev]:
+						continue
+					remaining[prev] -= 1
+					if not remaining[prev] and not escapes[prev]:
+						losses[max(plies + 1, floor[prev])].append(prev)
+
+			if not wins and not losses:
+				break
+
+		self.tables[material] = values
+		return values
+
+
+def write(material: Material, values: array[int], directory: str = DEFAULT_DIRECTORY) -> str:
+	os.makedirs(directory, exist_ok=True)
+	path = os.path.join(directory, material.name + EXTENSION)
+	with open(path, "wb") as f:
+		f.write(MAGIC + bytes([len(material.pieces)]))
+		values.tofile(f)
+	return path
+
+
+class Tablebase:
+	def __init__(self, path: str):
+		self.material = Material.parse(os.path.basename(path).removesuffix(EXTENSION))
+		self.file = open(path, "rb")
+		self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+		self.offset = len(MAGIC) + 1
+		if self.map[:len(MAGIC)] != MAGIC or self.map[len(MAGIC)] != len(self.material.pieces):
+			self.close()
+			raise ValueError(f"El fitxer no és una taula vàlida: {path}")
+
+	def close(self):
+		self.map.close()
+		self.file.close()
+
+	def value(self, squares: list[int], side: Team) -> int:
+		b = self.map[self.offset + self.material.index(squares, side)]
+		return b - 256 if b > 127 else b
+
+
+class Tablebases:
+	"""Every table found in a directory, probed by the material of the position."""
+
+	def __init__(self, directory: str = DEFAULT_DIRECTORY):
+		self.tables: dict[Material, Tablebase] = {}
+		for name in sorted(os.listdir(directory)):
+			if name.endswith(EXTENSION):
+				table = Tablebase(os.path.join(directory, name))
+				self.tables[table.material] = table
+		self.max_pieces = max((len(m.pieces) for m in self.tables), default=0)
+
+	def close(self):
+		for table in self.tables.values():
+			table.close()
+
+	def probe(self, board: Board) -> int | None:
+		"""Value of the position for the side to move, or None if no table covers it."""
+		if bitboard.popcount(board.occupied()) > self.max_pieces:
+			return None
+		found = Material.of(board)
+		if found is None or found[0] not in self.tables:
+			return None
+
+		value = self.tables[found[0]].value(found[1], board.turn)
+		return None if value == INVALID else value
+
+
+if __name__ == '__main__':
+	parser = ArgumentParser(description="Genera taules de finals per anàlisi retrògrada.")
+	parser.add_argument("materials", nargs="+", help="material de cada taula, e.g. RDvR")
+	parser.add_argument("--dir", default=DEFAULT_DIRECTORY, help="directori on es desen les taules")
+	args = parser.parse_args()
+
+	generator = Generator()
+	for name in args.materials:
+		m = Material.parse(name)
+		print(f"{m.name}: {write(m, generator.generate(m), args.dir)}")
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass
+from enum import Enum, auto
+
+
+class Bound(Enum):
+	EXACT = 1
+	LOWER = 2  # the score is at least the stored one (fail high)
+	UPPER = 3  # the score is at most the stored one (fail low)
+
+
+class Replacement(Enum):
+	DEPTH = auto()  # keep the deepest results of a bucket
+	ALWAYS = auto()  # the newest result always gets stored
+
+
+@dataclass
+class Entry:
+	depth: int
+	bound: Bound
+	score: int
+	move: int
+
+
+class TranspositionTable:
+	"""
+	Fixed-size cache of search results indexed by position key. Entries live in two flat arrays of 64-bit words, one
+	for the keys and one for the packed data, plus one byte per bucket for the replace-always policy, so the memory used
+	is at most the requested size and does not grow with the number of positions stored.
+
+	Entries are grouped in buckets of BUCKET slots. A key can only be stored in the bucket it hashes to; when the
+	bucket is full, the replacement policy decides which slot is overwritten.
+
+	Data word layout, from the lowest bit: bound (2 bits, never 0 in a used slot), depth (8 bits), move (16 bits), 6
+	unused bits and the score (32 bits, offset so that it is stored unsigned).
+	"""
+
+	BUCKET = 4
+	ENTRY_BYTES = 16
+
+	MAX_DEPTH = 0xFF
+	SCORE_OFFSET = 1 << 31
+
+	def __init__(self, size_mb: float = 16, policy: Replacement = Replacement.DEPTH):
+		# Every bucket takes its slots and the byte of its next slot to overwrite
+		self.buckets = max(1, int(size_mb * (1 << 20)) // (self.BUCKET * self.ENTRY_BYTES + 1))
+		self.policy = policy
+
+		self.keys = array('Q', bytes(8 * self.buckets * self.BUCKET))
+		self.data = array('Q', bytes(8 * self.buckets * self.BUCKET))
+		# Slot of every bucket that the replace-always policy overwrites next
+		self.next_slot = bytearray(self.buckets)
+
+	@property
+	def size(self) -> int:
+		"""Number of slots"""
+		return len(self.keys)
+
+	@property
+	def size_bytes(self) -> int:
+		return self.keys.itemsize * len(self.keys) + self.data.itemsize * len(self.data) + len(self.next_slot)
+
+	def clear(self):
+		self.keys = array('Q', bytes(8 * self.size))
+		self.data = array('Q', bytes(8 * self.size))
+		self.next_slot = bytearray(self.buckets)
+
+	def probe(self, key: int) -> Entry | None:
+		start = key % self.buckets * self.BUCKET
+
+		for i in range(start, start + self.BUCKET):
+			if self.keys[i] == key and self.data[i]:
+				return self.unpack(self.data[i])
+
+		return None
+
+	def store(self, key: int, depth: int, bound: Bound, score: int, move: int = 0):
+		start = key % self.buckets * self.BUCKET
+		slot = -1
+		shallowest = self.MAX_DEPTH + 1
+
+		for i in range(start, start + self.BUCKET):
+			data = self.data[i]
+
+			if not data or self.keys[i] == key:
+				# A result for the same position is only replaced by a deeper one, unless the policy says otherwise
+				if data and self.policy is Replacement.DEPTH and depth < data >> 2 & self.MAX_DEPTH:
+					return
+				slot = i
+				break
+
+			d = data >> 2 & self.MAX_DEPTH
+			if d < shallowest:
+				shallowest = d
+				slot = i
+
+		if self.policy is Replacement.ALWAYS and self.data[slot] and self.keys[slot] != key:
+			# Evict in turn, so that a full bucket keeps the latest results
+			bucket = start // self.BUCKET
+			slot = start + self.next_slot[bucket]
+			self.next_slot[bucket] = (self.next_slot[bucket] + 1) % self.BUCKET
+
+		self.keys[slot] = key
+		self.data[slot] = self.pack(depth, bound, score, move)
+
+	def hashfull(self) -> int:
+		"""Used slots per thousand, estimated from the first thousand slots."""
+		sample = self.data[:1000]
+		return sum(1 for d in sample if d) * 1000 // len(sample)
+
+	@classmethod
+	def pack(cls, depth: int, bound: Bound, score: int, move: int) -> int:
+		return (bound.value | min(depth, cls.MAX_DEPTH) << 2 | (move & 0xFFFF) << 10 |
+		        (score + cls.SCORE_OFFSET) << 32)
+
+	@classmethod
+	def unpack(cls, data: int) -> Entry:
+		return Entry(data >> 2 & cls.MAX_DEPTH, Bound(data & 3), (data >> 32) - cls.SCORE_OFFSET, data >> 10 & 0xFFFF)
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from random import Random
+from typing import Hashable, Iterable
+
+import bitboard
+
+# Default seed of the key tables, so that keys are the same from one run to the next
+SEED = 0x5079746843686573
+
+
+class Zobrist:
+	"""
+	Random 64-bit keys for every (piece, square) pair plus one for the side to move. The key of a position is the XOR of
+	the keys of its pieces, so it can be updated by toggling only what a move changes.
+	"""
+
+	def __init__(self, seed: int, pieces: Iterable[Hashable], squares: int = bitboard.SQUARES):
+		rng = Random(seed)
+
+		self.seed = seed
+		self.side = rng.getrandbits(64)
+		self.pieces = {p: [rng.getrandbits(64) for _ in range(squares)] for p in pieces}